@@ -2,9 +2,12 @@
 依赖管理 API
 处理服务间依赖关系的增删查和拓扑图数据
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.etag import make_etag, not_modified, set_etag
 from app.database import get_db
 from app.schemas.dependency import (
     DependencyCreate,
@@ -12,6 +15,7 @@ from app.schemas.dependency import (
     TopologyResponse
 )
 from app.services import dependency as dependency_service
+from app.services.cache import query_cache
 
 
 router = APIRouter()
@@ -44,9 +48,16 @@ async def create_dependency(
     summary="获取所有依赖关系",
     description="获取系统中定义的所有服务依赖关系"
 )
-async def list_dependencies(db: AsyncSession = Depends(get_db)):
+async def list_dependencies(
+    limit: Optional[int] = Query(None, ge=1, le=1000, description="返回数量上限（不填则返回全部）"),
+    offset: int = Query(0, ge=0, description="跳过的记录数"),
+    db: AsyncSession = Depends(get_db)
+):
     """获取所有依赖关系"""
-    return await dependency_service.get_all_dependencies(db)
+    dependencies = await dependency_service.get_all_dependencies(
+        db, limit=limit, offset=offset
+    )
+    return [DependencyResponse.from_dependency(d) for d in dependencies]
 
 
 @router.delete(
@@ -80,9 +91,10 @@ async def get_service_dependencies(
     db: AsyncSession = Depends(get_db)
 ):
     """获取服务的依赖（作为调用方）"""
-    return await dependency_service.get_service_dependencies(
+    dependencies = await dependency_service.get_service_dependencies(
         db, service_id, as_source=True
     )
+    return [DependencyResponse.from_dependency(d) for d in dependencies]
 
 
 @router.get(
@@ -96,17 +108,25 @@ async def get_service_dependents(
     db: AsyncSession = Depends(get_db)
 ):
     """获取依赖该服务的其他服务"""
-    return await dependency_service.get_service_dependencies(
+    dependencies = await dependency_service.get_service_dependencies(
         db, service_id, as_source=False
     )
+    return [DependencyResponse.from_dependency(d) for d in dependencies]
 
 
 @router.get(
     "/topology",
-    response_model=TopologyResponse,
+    response_model=None,
+    responses={200: {"model": TopologyResponse}},
     summary="获取拓扑图数据",
     description="获取服务依赖拓扑图的节点和边数据，用于前端可视化"
 )
-async def get_topology(db: AsyncSession = Depends(get_db)):
+async def get_topology(request: Request) -> Response:
     """获取拓扑图数据"""
-    return await dependency_service.get_topology(db)
+    etag = make_etag(query_cache.version)
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+
+    content = await dependency_service.get_topology_json()
+    return set_etag(Response(content=content, media_type="application/json"), etag)
@@ -4,49 +4,76 @@
 """
 from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.etag import make_etag, not_modified, set_etag
+from app.core.responses import PydanticJSONResponse
 from app.database import get_db
-from app.schemas.service import ServiceResponse, ServiceListResponse
+from app.schemas.service import ServiceResponse, ServiceListResponse, ServiceStatus
 from app.services import registry as registry_service
 from app.services import discovery as discovery_service
+from app.services import heartbeat_buffer
+from app.services.cache import query_cache
 
 
 router = APIRouter()
 
 
+def service_list_etag(request: Request) -> str:
+    """服务列表的 ETag：服务数据版本 + 心跳版本 + 查询参数"""
+    return make_etag(query_cache.version, heartbeat_buffer.version, request.url.query)
+
+
+def service_list_response(services: list) -> PydanticJSONResponse:
+    """
+    构建服务列表响应
+    数据来自数据库（写入时已校验），直接序列化字段字典，跳过逐行的模型构建与校验
+    """
+    return PydanticJSONResponse({
+        "total": len(services),
+        "services": [s.to_response_dict() for s in services],
+    })
+
+
+def service_response(service, status_code: int = 200) -> PydanticJSONResponse:
+    """
+    构建单个服务的响应
+    直接返回响应对象：声明了 response_model 的端点返回模型时，FastAPI 仍会对其校验并序列化，
+    数据来自数据库（写入时已校验），这里直接序列化字段字典；response_model 只用于生成文档
+    """
+    return PydanticJSONResponse(service.to_response_dict(), status_code=status_code)
+
+
 @router.get(
     "/services",
-    response_model=ServiceListResponse,
+    response_model=None,
+    responses={200: {"model": ServiceListResponse}},
     summary="获取服务列表",
     description="获取所有注册的服务，支持按状态和类型过滤"
 )
 async def list_services(
-    status: Optional[str] = Query(
+    request: Request,
+    status: Optional[ServiceStatus] = Query(
         None,
-        description="按状态过滤：healthy / unhealthy / unknown"
+        description="按状态过滤"
     ),
     is_gateway: Optional[bool] = Query(
         None,
         description="是否只获取网关服务"
     ),
     db: AsyncSession = Depends(get_db)
-):
+) -> PydanticJSONResponse:
     """获取服务列表"""
+    etag = service_list_etag(request)
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+
     services = await registry_service.get_all_services(
-        db, status=status, is_gateway=is_gateway
-    )
-    return ServiceListResponse(
-        total=len(services),
-        services=[
-            ServiceResponse(
-                **{k: v for k, v in s.__dict__.items() if not k.startswith("_")},
-                base_url=s.base_url
-            )
-            for s in services
-        ]
+        db, status=status.value if status else None, is_gateway=is_gateway
     )
+    return set_etag(service_list_response(services), etag)
 
 
 @router.get(
@@ -66,31 +93,28 @@ async def get_service(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"服务 '{service_id}' 不存在"
         )
-    return ServiceResponse(
-        **{k: v for k, v in service.__dict__.items() if not k.startswith("_")},
-        base_url=service.base_url
-    )
+    return service_response(service)
 
 
 @router.get(
     "/gateways",
-    response_model=ServiceListResponse,
+    response_model=None,
+    responses={200: {"model": ServiceListResponse}},
     summary="获取网关列表",
     description="获取所有标记为网关的服务"
 )
-async def list_gateways(db: AsyncSession = Depends(get_db)):
+async def list_gateways(
+    request: Request,
+    db: AsyncSession = Depends(get_db)
+) -> PydanticJSONResponse:
     """获取网关服务列表"""
+    etag = service_list_etag(request)
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+
     gateways = await discovery_service.get_gateways(db)
-    return ServiceListResponse(
-        total=len(gateways),
-        services=[
-            ServiceResponse(
-                **{k: v for k, v in s.__dict__.items() if not k.startswith("_")},
-                base_url=s.base_url
-            )
-            for s in gateways
-        ]
-    )
+    return set_etag(service_list_response(gateways), etag)
 
 
 @router.get(
@@ -110,7 +134,4 @@ async def discover_service(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"服务 '{service_id}' 不存在或不健康"
         )
-    return ServiceResponse(
-        **{k: v for k, v in service.__dict__.items() if not k.startswith("_")},
-        base_url=service.base_url
-    )
+    return service_response(service)
@@ -5,7 +5,6 @@
 from typing import Optional
 
 from fastapi import APIRouter, Depends, HTTPException, status, Query, Header
-from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import get_db
@@ -19,6 +18,7 @@ from app.schemas.route import (
     AuthServiceInfo,
 )
 from app.services import gateway as gateway_service
+from app.services import registry as registry_service
 from app.models.service import Service
 
 
@@ -58,9 +58,10 @@ async def list_routes(
     db: AsyncSession = Depends(get_db)
 ):
     """获取路由规则列表"""
-    return await gateway_service.get_all_routes(
+    routes = await gateway_service.get_all_routes(
         db, gateway_id=gateway_id, enabled_only=enabled_only
     )
+    return [RouteResponse.from_route(r) for r in routes]
 
 
 @router.get(
@@ -154,23 +155,32 @@ async def get_gateway_routes(
         )
 
     # 获取该网关的所有启用的路由规则
-    routes = await gateway_service.get_all_routes(
-        db, gateway_id=x_gateway_id, enabled_only=True
-    )
+    routes = await gateway_service.get_route_rows(db, x_gateway_id)
 
-    # 查找所有认证服务（service_type = "authentication"）
-    auth_services = {}
-    auth_result = await db.execute(select(Service))
-    for svc in auth_result.scalars():
-        service_meta = svc.service_meta or {}
-        if service_meta.get("service_type") == "authentication":
-            auth_services[svc.id] = svc
+    # 一次查询取回所有目标服务和路由认证配置中引用的认证服务
+    needed_ids = {route.target_service_id for route in routes}
+    for route in routes:
+        if route.auth_config and route.auth_config.get("auth_service_id"):
+            needed_ids.add(route.auth_config["auth_service_id"])
+    services_by_id = await registry_service.get_services_by_ids(db, needed_ids)
+
+    # 其中的认证服务（service_type = "authentication"）
+    auth_services = {
+        svc.id: svc for svc in services_by_id.values()
+        if svc.service_type == "authentication"
+    }
+
+    # 网关到各目标服务的最高优先级路由（routes 已按优先级降序排列）
+    # 用于组装认证服务的登录重定向路径，同一认证服务只需解析一次，无需逐条查询
+    routes_by_target = {}
+    for route in routes:
+        routes_by_target.setdefault(route.target_service_id, route)
 
     # 构建响应，包含目标服务的完整信息
     result = []
     for route in routes:
         # 获取目标服务信息
-        target_service = await db.get(Service, route.target_service_id)
+        target_service = services_by_id.get(route.target_service_id)
         if not target_service:
             # 目标服务不存在，跳过此路由
             continue
@@ -207,9 +217,7 @@ async def get_gateway_routes(
                             login_path = "/" + login_path
                         # 查找网关到认证服务的路由，使用网关代理路径
                         # 例如：网关有 /aegis/** -> aegis 的路由，则使用 /aegis/admin/login
-                        auth_route = await gateway_service.find_route_for_service(
-                            db, gateway_id=x_gateway_id, target_service_id=auth_service_id
-                        )
+                        auth_route = routes_by_target.get(auth_service_id)
                         if auth_route and auth_route.strip_prefix:
                             # 使用网关代理路径（相对路径，浏览器会自动补全域名）
                             gateway_prefix = auth_route.strip_path or f"/{auth_service_id}"
@@ -223,12 +231,14 @@ async def get_gateway_routes(
 
             auth_config = AuthConfig(**auth_config_dict)
 
-        result.append(GatewayRouteResponse(
+        # 路由和目标服务均来自数据库，跳过重复校验
+        # auth_config / auth_service 含 service_meta 中的自由数据，仍走完整校验
+        result.append(GatewayRouteResponse.model_construct(
             id=route.id,
             path_pattern=route.path_pattern,
-            methods=route.methods if hasattr(route, 'methods') else "*",
+            methods=route.methods,
             target_service_id=route.target_service_id,
-            target_service=TargetServiceInfo(
+            target_service=TargetServiceInfo.model_construct(
                 id=target_service.id,
                 name=target_service.name,
                 host=target_service.host,
@@ -2,12 +2,15 @@
 监控统计 API
 提供服务状态统计和监控信息
 """
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.etag import make_etag, not_modified, set_etag
+from app.core.responses import PydanticJSONResponse
 from app.database import get_db
 from app.services import discovery as discovery_service
 from app.services import health as health_service
+from app.services.cache import query_cache
 
 
 router = APIRouter()
@@ -15,11 +18,22 @@ router = APIRouter()
 
 @router.get(
     "/monitor/overview",
+    response_class=PydanticJSONResponse,
     summary="监控概览",
     description="获取服务注册中心的整体监控统计信息"
 )
-async def get_overview(db: AsyncSession = Depends(get_db)):
+async def get_overview(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db)
+):
     """获取监控概览"""
+    etag = make_etag(query_cache.version)
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+    set_etag(response, etag)
+
     stats = await discovery_service.get_service_stats(db)
     return {
         "status": "running",
@@ -29,6 +43,7 @@ async def get_overview(db: AsyncSession = Depends(get_db)):
 
 @router.post(
     "/monitor/health-check",
+    response_class=PydanticJSONResponse,
     summary="触发健康检查",
     description="手动触发一次全量健康检查"
 )
@@ -2,11 +2,18 @@
 服务注册 API
 处理服务的注册、注销、更新、心跳等操作
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.api.discovery import service_response
 from app.database import get_db
-from app.schemas.service import ServiceCreate, ServiceUpdate, ServiceResponse
+from app.schemas.service import (
+    ServiceCreate,
+    ServiceUpdate,
+    ServiceResponse,
+    HeartbeatBatchRequest,
+    HeartbeatBatchResponse,
+)
 from app.services import registry as registry_service
 
 
@@ -22,14 +29,14 @@ router = APIRouter()
 )
 async def register_service(
     service_data: ServiceCreate,
+    heartbeat: bool = Query(False, description="同时视为一次心跳，注册后直接标记为 healthy"),
     db: AsyncSession = Depends(get_db)
 ):
     """注册或更新服务"""
-    service = await registry_service.register_service(db, service_data)
-    return ServiceResponse(
-        **{k: v for k, v in service.__dict__.items() if not k.startswith("_")},
-        base_url=service.base_url
+    service = await registry_service.register_service(
+        db, service_data, heartbeat=heartbeat
     )
+    return service_response(service, status_code=status.HTTP_201_CREATED)
 
 
 @router.delete(
@@ -70,10 +77,22 @@ async def update_service(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"服务 '{service_id}' 不存在"
         )
-    return ServiceResponse(
-        **{k: v for k, v in service.__dict__.items() if not k.startswith("_")},
-        base_url=service.base_url
-    )
+    return service_response(service)
+
+
+@router.post(
+    "/services/heartbeats",
+    response_model=HeartbeatBatchResponse,
+    summary="批量心跳上报",
+    description="一次上报多个服务的心跳（同一进程中注册了多个服务时使用），返回不存在的服务 ID 以便客户端重新注册"
+)
+async def heartbeat_batch(
+    batch: HeartbeatBatchRequest,
+    db: AsyncSession = Depends(get_db)
+):
+    """批量心跳上报"""
+    accepted, missing = await registry_service.heartbeat_many(db, batch.service_ids)
+    return HeartbeatBatchResponse(accepted=accepted, missing=missing)
 
 
 @router.post(
@@ -93,7 +112,4 @@ async def heartbeat(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"服务 '{service_id}' 不存在"
         )
-    return ServiceResponse(
-        **{k: v for k, v in service.__dict__.items() if not k.startswith("_")},
-        base_url=service.base_url
-    )
+    return service_response(service)
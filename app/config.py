@@ -20,14 +20,21 @@ class Settings(BaseSettings):
 
     # 数据库配置（SQLite）
     database_url: str = "sqlite+aiosqlite:///./serviceatlas.db"
+    db_pool_size: int = 8            # 连接池常驻连接数
+    db_max_overflow: int = 16        # 连接池允许临时超出的连接数
 
     # 健康检查配置
     health_check_interval: int = 30  # 健康检查间隔（秒）
     health_check_timeout: int = 5    # 单次检查超时（秒）
     unhealthy_threshold: int = 3     # 连续失败次数阈值，超过则标记为 unhealthy
+    health_check_concurrency: int = 50  # 同时进行的健康检查请求数上限
 
     # 心跳配置
     heartbeat_timeout: int = 60      # 心跳超时时间（秒），超过未收到心跳标记为 unhealthy
+    heartbeat_flush_interval: float = 0.5  # 心跳批量写入间隔（秒）
+
+    # 查询缓存配置（网关列表、服务统计等读多写少的查询）
+    query_cache_ttl: float = 2.0     # 缓存有效期（秒），写操作会立即使缓存失效
 
     # API 前缀
     api_prefix: str = "/api/v1"
@@ -0,0 +1,40 @@
+"""
+ETag 条件请求
+读接口以数据版本号生成 ETag，客户端携带的 If-None-Match 匹配时直接返回 304，
+不再查询和序列化数据
+"""
+import hashlib
+import os
+from typing import Optional
+
+from fastapi import Request, Response
+
+
+# 进程级随机盐：版本号在重启后从头计数，加盐避免重启前后的 ETag 相同而数据不同
+_ETAG_SALT = os.urandom(16)
+
+
+def make_etag(*parts: object) -> str:
+    """根据版本号等组成部分生成强 ETag"""
+    key = "|".join(map(str, parts)).encode()
+    digest = hashlib.blake2b(key, digest_size=8, salt=_ETAG_SALT).hexdigest()
+    return f'"{digest}"'
+
+
+def not_modified(request: Request, etag: str) -> Optional[Response]:
+    """If-None-Match 与当前 ETag 匹配时返回 304 响应，否则返回 None"""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return None
+    # If-None-Match 使用弱比较，忽略 W/ 前缀
+    tags = [t.strip().removeprefix("W/") for t in if_none_match.split(",")]
+    if etag in tags or "*" in tags:
+        return set_etag(Response(status_code=304), etag)
+    return None
+
+
+def set_etag(response: Response, etag: str) -> Response:
+    """设置 ETag，并要求客户端每次使用缓存前重新验证"""
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
+    return response
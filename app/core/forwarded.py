@@ -0,0 +1,21 @@
+"""
+反向代理相关的请求头工具
+"""
+from starlette.requests import Request
+
+
+# ASGI 规范中请求头名称均为小写 bytes
+_FORWARDED_PREFIX = b"x-forwarded-prefix"
+
+
+def get_forwarded_prefix(request: Request) -> str:
+    """
+    获取网关传入的路径前缀（X-Forwarded-Prefix，去掉末尾斜杠），不存在时返回空字符串
+
+    直接扫描 ASGI 原始请求头，按 bytes 比较，
+    不构造 Headers 对象，也不解码其他无关的请求头
+    """
+    for key, value in request.scope["headers"]:
+        if key == _FORWARDED_PREFIX:
+            return value.decode("latin-1").rstrip("/")
+    return ""
@@ -0,0 +1,43 @@
+"""
+共享 HTTP 客户端
+整个进程复用同一个 httpx.AsyncClient（连接池 + keep-alive），
+避免每次请求都重新建立 TCP/TLS 连接。由应用生命周期负责创建和关闭。
+"""
+from typing import Optional
+
+import httpx
+
+from app.config import settings
+
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def init_http_client() -> httpx.AsyncClient:
+    """创建共享客户端（应用启动时调用）"""
+    global _client
+    if _client is None or _client.is_closed:
+        # HTTPS 目标通过 ALPN 协商使用 HTTP/2，同一连接上多路复用并发请求
+        _client = httpx.AsyncClient(
+            http2=True,
+            timeout=settings.health_check_timeout,
+            limits=httpx.Limits(
+                max_keepalive_connections=100,
+                max_connections=500,
+                keepalive_expiry=60,
+            ),
+        )
+    return _client
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """获取共享客户端"""
+    return init_http_client()
+
+
+async def close_http_client() -> None:
+    """关闭共享客户端（应用关闭时调用）"""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
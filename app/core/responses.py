@@ -0,0 +1,23 @@
+"""
+JSON 响应类
+"""
+from typing import Any
+
+from fastapi.responses import JSONResponse
+from pydantic_core import to_json
+
+
+class PydanticJSONResponse(JSONResponse):
+    """
+    使用 pydantic-core（Rust 实现）序列化的 JSON 响应
+
+    替代 JSONResponse 中的标准库 json.dumps，
+    可直接序列化 dict / list / datetime / Pydantic 模型。
+
+    不要把它设为声明了 response_model 的端点的 response_class：FastAPI 仍会先校验返回值，
+    在 FastAPI 0.130+ 中还会关闭由 Pydantic 直接序列化为 JSON bytes 的快速路径。
+    需要跳过返回值校验时，由端点直接返回该响应对象（response_model 只用于生成文档）。
+    """
+
+    def render(self, content: Any) -> bytes:
+        return to_json(content)
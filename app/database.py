@@ -2,18 +2,70 @@
 数据库连接与初始化模块
 使用 SQLAlchemy 2.0 异步模式 + aiosqlite
 """
+import logging
+
+from pydantic_core import from_json, to_json
+from sqlalchemy import delete, event, func, inspect, select
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 from app.config import settings
 
 
+logger = logging.getLogger(__name__)
+
+
+# 连接池配置：连接在请求之间复用，不必每次重新打开数据库并执行 PRAGMA，
+# 页缓存也得以保留。显式指定连接池，不依赖 SQLAlchemy 各版本对 aiosqlite 的默认策略
+# （内存数据库每个连接都是独立的库，不能使用连接池）
+engine_options = {}
+if ":memory:" not in settings.database_url:
+    engine_options.update(
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+    )
+
+
+def _json_serializer(value) -> str:
+    """JSON 列序列化（pydantic-core，Rust 实现）"""
+    return to_json(value).decode()
+
+
 # 创建异步引擎
+# JSON 列（service_meta、auth_config）使用 pydantic-core 编解码，替代标准库 json
 engine = create_async_engine(
     settings.database_url,
     echo=settings.debug,  # debug 模式下打印 SQL
+    json_serializer=_json_serializer,
+    json_deserializer=from_json,
+    **engine_options,
+)
+
+
+# SQLite 连接参数
+# - WAL：读写互不阻塞，心跳/健康检查写入时查询不被串行化
+# - synchronous=NORMAL：WAL 模式下只在检查点 fsync，断电最多丢失最近的事务，不会损坏数据库
+# - 临时表放内存、启用 mmap、加大页缓存（负数单位为 KiB）
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA cache_size=-65536",
 )
 
+
+if engine.dialect.name == "sqlite":
+    @event.listens_for(engine.sync_engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        """每个新建的 SQLite 连接都设置一次 PRAGMA"""
+        cursor = dbapi_connection.cursor()
+        for pragma in SQLITE_PRAGMAS:
+            cursor.execute(pragma)
+        cursor.close()
+
 # 创建异步会话工厂
 async_session_maker = async_sessionmaker(
     engine,
@@ -31,6 +83,35 @@ async def init_db():
     """初始化数据库，创建所有表"""
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        # create_all 不会给已存在的表补建索引，旧数据库需要单独创建
+        await conn.run_sync(_create_missing_indexes)
+
+
+def _create_missing_indexes(sync_conn) -> None:
+    inspector = inspect(sync_conn)
+    for table in Base.metadata.sorted_tables:
+        existing = {ix["name"] for ix in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name in existing:
+                continue
+            if index.unique:
+                _delete_duplicates(sync_conn, table, index)
+            index.create(sync_conn)
+
+
+def _delete_duplicates(sync_conn, table, index) -> None:
+    """
+    补建唯一索引前删除重复行（每组保留主键最小的一行）
+    旧版本先查询后插入，并发创建时可能写入重复数据，不清理会导致建索引失败、服务无法启动
+    """
+    (pk,) = table.primary_key.columns
+    keep = select(func.min(pk)).group_by(*index.columns)
+    result = sync_conn.execute(delete(table).where(pk.not_in(keep)))
+    if result.rowcount:
+        logger.warning(
+            "补建唯一索引 %s：删除 %s 中 %d 条重复数据",
+            index.name, table.name, result.rowcount
+        )
 
 
 async def get_db() -> AsyncSession:
@@ -2,34 +2,50 @@
 ServiceAtlas - 轻量级服务注册中心
 FastAPI 应用入口
 """
+import asyncio
 from contextlib import asynccontextmanager
+from typing import Awaitable, Callable
 
 import os
 from fastapi import FastAPI, Request
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse, Response, RedirectResponse
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
 
 from app.config import settings, BASE_DIR
 from app.database import init_db, async_session_maker
 from app.api import api_router
+from app.core.forwarded import get_forwarded_prefix
+from app.core.http_client import init_http_client, close_http_client
+from app.core.responses import PydanticJSONResponse
 # Jinja2 Web 路由（已禁用，保留文件以备回退）
 # from app.web.routes import router as web_router
+from app.services.cache import query_cache
 from app.services.health import check_all_services, check_heartbeat_timeout
+from app.services.heartbeat_buffer import start_heartbeat_flusher, stop_heartbeat_flusher
 from app.services.preload import preload_services
-from app.services.registry import register_service, heartbeat as service_heartbeat
+from app.services.registry import heartbeat as service_heartbeat
 from app.schemas.service import ServiceCreate
 
 
-# 健康检查调度器
-scheduler = AsyncIOScheduler()
+async def run_periodic(job: Callable[[], Awaitable[object]], interval: float) -> None:
+    """按固定间隔循环执行定时任务（首次执行在一个间隔之后），单次失败不影响后续执行"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await job()
+        except Exception as e:
+            print(f"定时任务 {job.__name__} 执行失败: {e}")
 
 
 async def self_heartbeat():
-    """ServiceAtlas 自心跳任务"""
+    """ServiceAtlas 自心跳任务（复用应用生命周期内的同一个会话）"""
     if settings.self_register:
-        async with async_session_maker() as db:
+        db = app.state.heartbeat_session
+        try:
             await service_heartbeat(db, settings.service_id)
+        finally:
+            # 归还连接并清空 identity map，下次心跳不会读到过期的对象
+            await db.close()
 
 
 @asynccontextmanager
@@ -40,61 +56,59 @@ async def lifespan(app: FastAPI):
     await init_db()
     print(f"数据库初始化完成")
 
+    # 创建共享 HTTP 客户端（健康检查复用连接池）
+    init_http_client()
+
+    # 自注册：将 ServiceAtlas 自己注册到服务列表（与预加载的服务一起批量写入）
+    extra_services = []
+    if settings.self_register:
+        extra_services.append(ServiceCreate(
+            id=settings.service_id,
+            name=f"{settings.app_name} 服务注册中心",
+            host=settings.host,
+            port=settings.port,
+            protocol="http",
+            health_check_path="/health",
+            is_gateway=False,
+            base_path=settings.base_path if settings.base_path else None,
+            service_meta={
+                "version": settings.app_version,
+                "description": "服务注册与发现中心",
+                # 声明认证需求，网关会自动应用到路由规则
+                "auth_config": {
+                    "require_auth": True,
+                    "auth_service_id": "aegis",
+                    # API 文档不再公开，需要认证后才能访问
+                    "public_paths": [
+                        "/health",
+                    ],
+                },
+            },
+        ))
+
     # 从配置文件预加载服务
     async with async_session_maker() as db:
-        await preload_services(db)
-
-        # 自注册：将 ServiceAtlas 自己注册到服务列表
-        if settings.self_register:
-            self_service = ServiceCreate(
-                id=settings.service_id,
-                name=f"{settings.app_name} 服务注册中心",
-                host=settings.host,
-                port=settings.port,
-                protocol="http",
-                health_check_path="/health",
-                is_gateway=False,
-                base_path=settings.base_path if settings.base_path else None,
-                service_meta={
-                    "version": settings.app_version,
-                    "description": "服务注册与发现中心",
-                    # 声明认证需求，网关会自动应用到路由规则
-                    "auth_config": {
-                        "require_auth": True,
-                        "auth_service_id": "aegis",
-                        # API 文档不再公开，需要认证后才能访问
-                        "public_paths": [
-                            "/health",
-                        ],
-                    },
-                },
-            )
-            await register_service(db, self_service)
-            print(f"ServiceAtlas 已自注册（ID: {settings.service_id}, base_path: {settings.base_path or '未设置'}）")
+        await preload_services(db, extra_services)
+
+    if settings.self_register:
+        print(f"ServiceAtlas 已自注册（ID: {settings.service_id}, base_path: {settings.base_path or '未设置'}）")
+
+    # 启动心跳批量写入任务
+    start_heartbeat_flusher()
 
     # 启动健康检查定时任务
-    scheduler.add_job(
-        check_all_services,
-        'interval',
-        seconds=settings.health_check_interval,
-        id='health_check'
-    )
-    scheduler.add_job(
-        check_heartbeat_timeout,
-        'interval',
-        seconds=settings.health_check_interval,
-        id='heartbeat_timeout'
-    )
+    periodic_tasks = [
+        asyncio.create_task(run_periodic(check_all_services, settings.health_check_interval)),
+        asyncio.create_task(run_periodic(check_heartbeat_timeout, settings.health_check_interval)),
+    ]
     # 自心跳任务（保持 ServiceAtlas 自己的 healthy 状态）
     if settings.self_register:
-        scheduler.add_job(
-            self_heartbeat,
-            'interval',
-            seconds=30,  # 每 30 秒发送一次自心跳
-            id='self_heartbeat'
-        )
-    scheduler.start()
-    print(f"健康检查调度器已启动（间隔: {settings.health_check_interval}秒）")
+        app.state.heartbeat_session = async_session_maker()
+        # 每 30 秒发送一次自心跳
+        periodic_tasks.append(asyncio.create_task(run_periodic(self_heartbeat, 30)))
+    # 记录在 app.state 上，便于关闭时统一取消
+    app.state.periodic_tasks = periodic_tasks
+    print(f"健康检查定时任务已启动（间隔: {settings.health_check_interval}秒）")
 
     print(f"\n{'='*50}")
     print(f"  ServiceAtlas 服务注册中心已启动")
@@ -105,8 +119,21 @@ async def lifespan(app: FastAPI):
     yield
 
     # 关闭时
-    scheduler.shutdown()
-    print("健康检查调度器已停止")
+    for task in app.state.periodic_tasks:
+        task.cancel()
+    await asyncio.gather(*app.state.periodic_tasks, return_exceptions=True)
+    print("健康检查定时任务已停止")
+
+    if settings.self_register:
+        await app.state.heartbeat_session.close()
+
+    # 写入缓冲区中剩余的心跳
+    await stop_heartbeat_flusher()
+
+    # 清空查询缓存及其加载锁，应用在新的事件循环中再次启动时不会用到旧的锁
+    query_cache.clear()
+
+    await close_http_client()
 
 
 # 创建 FastAPI 应用
@@ -132,22 +159,26 @@ app.include_router(api_router, prefix=settings.api_prefix)
 # 根路径重定向到 Vue 前端
 @app.get("/", include_in_schema=False)
 async def root(request: Request):
-    from fastapi.responses import RedirectResponse
-    base_path = request.headers.get("X-Forwarded-Prefix", "").rstrip("/")
+    base_path = get_forwarded_prefix(request)
     return RedirectResponse(url=f"{base_path}/app")
 
 
+# 固定内容的响应只构建一次，每次请求直接返回，不再重复序列化
+_HEALTH_RESPONSE = PydanticJSONResponse({"status": "healthy", "service": "ServiceAtlas"})
+_FAVICON_RESPONSE = Response(status_code=204)
+
+
 # 健康检查端点（供自身健康检查）
-@app.get("/health", tags=["健康检查"])
+@app.get("/health", tags=["健康检查"], response_class=PydanticJSONResponse)
 async def health():
     """服务健康检查端点"""
-    return {"status": "healthy", "service": "ServiceAtlas"}
+    return _HEALTH_RESPONSE
 
 
 @app.get("/favicon.ico", include_in_schema=False)
 async def favicon():
     """返回空的 favicon，避免 404 错误"""
-    return Response(status_code=204)
+    return _FAVICON_RESPONSE
 
 
 # Vue 前端路由（如果构建产物存在）
@@ -159,7 +190,7 @@ if VUE_APP_DIR.exists() and (VUE_APP_DIR / "index.html").exists():
     @app.get("/app", include_in_schema=False)
     async def vue_app_redirect(request: Request):
         """重定向到带末尾斜杠的路径，确保相对路径正确解析"""
-        prefix = request.headers.get("X-Forwarded-Prefix", "").rstrip("/")
+        prefix = get_forwarded_prefix(request)
         return RedirectResponse(url=f"{prefix}/app/", status_code=302)
 
     @app.get("/app/", include_in_schema=False)
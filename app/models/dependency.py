@@ -5,7 +5,7 @@
 from datetime import datetime
 from typing import Optional
 
-from sqlalchemy import String, Integer, DateTime, ForeignKey
+from sqlalchemy import String, Integer, DateTime, ForeignKey, Index, func
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.database import Base
@@ -15,6 +15,17 @@ class Dependency(Base):
     """服务依赖关系表"""
 
     __tablename__ = "dependencies"
+    __table_args__ = (
+        # 同一对服务之间只允许一条依赖关系（创建时据此去重）
+        Index(
+            "ux_dependencies_source_target",
+            "source_service_id",
+            "target_service_id",
+            unique=True,
+        ),
+        # 按被调用方查询（按调用方查询可以使用上面唯一索引的前缀）
+        Index("ix_dependencies_target", "target_service_id"),
+    )
 
     # 主键 ID
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
@@ -36,9 +47,9 @@ class Dependency(Base):
     # 依赖说明（描述调用关系的用途）
     description: Mapped[Optional[str]] = mapped_column(String(256), nullable=True)
 
-    # 创建时间
+    # 创建时间（由数据库生成，UTC）
     created_at: Mapped[datetime] = mapped_column(
-        DateTime, default=datetime.utcnow
+        DateTime, default=func.now(), server_default=func.now()
     )
 
     def __repr__(self) -> str:
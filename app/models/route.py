@@ -5,7 +5,7 @@
 from datetime import datetime
 from typing import Optional
 
-from sqlalchemy import String, Integer, Boolean, DateTime, ForeignKey, JSON
+from sqlalchemy import String, Integer, Boolean, DateTime, ForeignKey, Index, JSON, func
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.database import Base
@@ -15,6 +15,17 @@ class Route(Base):
     """网关路由规则表"""
 
     __tablename__ = "routes"
+    __table_args__ = (
+        # 按网关查询启用的路由并按优先级排序
+        Index(
+            "ix_routes_gateway_enabled_priority",
+            "gateway_service_id",
+            "enabled",
+            "priority",
+        ),
+    )
+    # 写入时通过 RETURNING 取回数据库生成的字段（created_at、updated_at），提交后无需再 refresh
+    __mapper_args__ = {"eager_defaults": True}
 
     # 主键 ID
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
@@ -60,14 +71,14 @@ class Route(Base):
     # }
     auth_config: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True)
 
-    # 创建时间
+    # 创建时间（由数据库生成，UTC）
     created_at: Mapped[datetime] = mapped_column(
-        DateTime, default=datetime.utcnow
+        DateTime, default=func.now(), server_default=func.now()
     )
 
-    # 更新时间
+    # 更新时间（由数据库生成，UTC）
     updated_at: Mapped[Optional[datetime]] = mapped_column(
-        DateTime, nullable=True, onupdate=datetime.utcnow
+        DateTime, nullable=True, onupdate=func.now()
     )
 
     def __repr__(self) -> str:
@@ -2,11 +2,15 @@
 服务表模型
 存储注册到注册中心的所有服务信息
 """
+import operator
 from datetime import datetime
-from typing import Optional
+from functools import cached_property
+from typing import Any, Optional
 
-from sqlalchemy import String, Integer, Boolean, DateTime, JSON
-from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import (
+    String, Integer, Boolean, DateTime, JSON, Index, event, func, inspect
+)
+from sqlalchemy.orm import Mapped, mapped_column, validates
 
 from app.database import Base
 
@@ -15,6 +19,13 @@ class Service(Base):
     """服务注册信息表"""
 
     __tablename__ = "services"
+    __table_args__ = (
+        # 按状态、是否网关过滤
+        Index("ix_services_status", "status"),
+        Index("ix_services_is_gateway", "is_gateway"),
+    )
+    # 写入时通过 RETURNING 取回数据库生成的字段（registered_at），提交后无需再 refresh
+    __mapper_args__ = {"eager_defaults": True}
 
     # 服务唯一标识（如 deckview, auth-gateway）
     id: Mapped[str] = mapped_column(String(64), primary_key=True)
@@ -46,9 +57,9 @@ class Service(Base):
     # 扩展元数据（版本号、标签等）
     service_meta: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True)
 
-    # 注册时间
+    # 注册时间（由数据库生成，UTC）
     registered_at: Mapped[datetime] = mapped_column(
-        DateTime, default=datetime.utcnow
+        DateTime, default=func.now(), server_default=func.now()
     )
 
     # 最后心跳时间
@@ -62,15 +73,55 @@ class Service(Base):
     def __repr__(self) -> str:
         return f"<Service(id={self.id}, name={self.name}, status={self.status})>"
 
-    @property
+    @cached_property
     def base_url(self) -> str:
-        """获取服务的基础 URL"""
+        """获取服务的基础 URL（首次访问时计算并缓存在实例上）"""
         return f"{self.protocol}://{self.host}:{self.port}"
 
+    @validates("protocol", "host", "port", "health_check_path")
+    def _validate_address_field(self, key: str, value: Any) -> Any:
+        """地址相关字段被修改时清除缓存的 URL"""
+        _reset_cached_urls(self)
+        return value
+
     @property
+    def service_type(self) -> Optional[str]:
+        """服务类型（service_meta.service_type，如 authentication）"""
+        return (self.service_meta or {}).get("service_type")
+
+    def to_response_dict(self) -> dict[str, Any]:
+        """转换为 ServiceResponse 所需的字段字典（包含 base_url）"""
+        return dict(zip(_RESPONSE_FIELDS, _get_response_values(self)))
+
+    @cached_property
     def health_url(self) -> str:
-        """获取健康检查的完整 URL"""
+        """获取健康检查的完整 URL（首次访问时计算并缓存在实例上）"""
         path = self.health_check_path
         if not path.startswith("/"):
             path = "/" + path
         return f"{self.base_url}{path}"
+
+
+def _reset_cached_urls(service: Service, *args: Any) -> None:
+    service.__dict__.pop("base_url", None)
+    service.__dict__.pop("health_url", None)
+
+
+# 字段从数据库重新加载（过期、刷新）时同样清除缓存的 URL
+event.listen(Service, "expire", _reset_cached_urls)
+event.listen(Service, "refresh", _reset_cached_urls)
+
+
+# 映射的全部列名，由 mapper 自省得到，新增列时自动同步
+_COLUMN_FIELDS = tuple(attr.key for attr in inspect(Service).mapper.column_attrs)
+
+# 不对外暴露的内部列
+_INTERNAL_FIELDS = frozenset({"consecutive_failures"})
+
+# ServiceResponse 所需的字段（base_url 为计算属性）
+_RESPONSE_FIELDS = tuple(
+    f for f in _COLUMN_FIELDS if f not in _INTERNAL_FIELDS
+) + ("base_url",)
+
+# attrgetter 一次 C 调用取出全部字段值
+_get_response_values = operator.attrgetter(*_RESPONSE_FIELDS)
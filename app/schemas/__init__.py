@@ -4,6 +4,8 @@ from app.schemas.service import (
     ServiceUpdate,
     ServiceResponse,
     ServiceListResponse,
+    HeartbeatBatchRequest,
+    HeartbeatBatchResponse,
 )
 from app.schemas.dependency import (
     DependencyCreate,
@@ -21,6 +23,8 @@ __all__ = [
     "ServiceUpdate",
     "ServiceResponse",
     "ServiceListResponse",
+    "HeartbeatBatchRequest",
+    "HeartbeatBatchResponse",
     "DependencyCreate",
     "DependencyResponse",
     "TopologyResponse",
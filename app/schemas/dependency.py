@@ -2,7 +2,7 @@
 依赖关系相关的 Pydantic 模式
 """
 from datetime import datetime
-from typing import Optional
+from typing import Any, Optional
 
 from pydantic import BaseModel, Field
 
@@ -44,6 +44,16 @@ class DependencyResponse(BaseModel):
     class Config:
         from_attributes = True
 
+    @classmethod
+    def from_dependency(cls, dependency: Any) -> "DependencyResponse":
+        """
+        从 ORM 依赖对象构建响应
+        数据来自数据库（写入时已校验），使用 model_construct 跳过重复校验
+        """
+        return cls.model_construct(
+            **{field: getattr(dependency, field) for field in cls.model_fields}
+        )
+
 
 class TopologyNode(BaseModel):
     """拓扑图节点"""
@@ -53,6 +63,9 @@ class TopologyNode(BaseModel):
     status: str
     is_gateway: bool
 
+    class Config:
+        frozen = True
+
 
 class TopologyEdge(BaseModel):
     """拓扑图边（依赖关系）"""
@@ -61,6 +74,9 @@ class TopologyEdge(BaseModel):
     target: str
     description: Optional[str] = None
 
+    class Config:
+        frozen = True
+
 
 class TopologyResponse(BaseModel):
     """拓扑图响应模式（用于前端可视化）"""
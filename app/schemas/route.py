@@ -2,7 +2,7 @@
 路由规则相关的 Pydantic 模式
 """
 from datetime import datetime
-from typing import Optional, List
+from typing import Any, Optional, List
 
 from pydantic import BaseModel, Field
 
@@ -115,6 +115,16 @@ class RouteResponse(BaseModel):
     class Config:
         from_attributes = True
 
+    @classmethod
+    def from_route(cls, route: Any) -> "RouteResponse":
+        """
+        从 ORM 路由对象构建响应
+        数据来自数据库（写入时已校验），使用 model_construct 跳过重复校验
+        """
+        return cls.model_construct(
+            **{field: getattr(route, field) for field in cls.model_fields}
+        )
+
 
 class TargetServiceInfo(BaseModel):
     """目标服务信息（供网关转发使用）"""
@@ -127,6 +137,9 @@ class TargetServiceInfo(BaseModel):
     status: str = Field(..., description="服务状态")
     base_url: str = Field(..., description="服务基础 URL")
 
+    class Config:
+        frozen = True
+
 
 class AuthServiceInfo(BaseModel):
     """认证服务信息"""
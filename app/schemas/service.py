@@ -3,11 +3,20 @@
 用于请求验证和响应序列化
 """
 from datetime import datetime
+from enum import Enum
 from typing import Optional, Any
 
 from pydantic import BaseModel, Field
 
 
+class ServiceStatus(str, Enum):
+    """服务状态"""
+
+    healthy = "healthy"
+    unhealthy = "unhealthy"
+    unknown = "unknown"
+
+
 class ServiceCreate(BaseModel):
     """创建服务的请求模式"""
 
@@ -106,3 +115,21 @@ class ServiceListResponse(BaseModel):
 
     total: int
     services: list[ServiceResponse]
+
+
+class HeartbeatBatchRequest(BaseModel):
+    """批量心跳上报的请求模式"""
+
+    service_ids: list[str] = Field(
+        ...,
+        max_length=1000,
+        description="上报心跳的服务 ID 列表",
+        examples=[["deckview", "auth-gateway"]]
+    )
+
+
+class HeartbeatBatchResponse(BaseModel):
+    """批量心跳上报的响应模式"""
+
+    accepted: list[str] = Field(default_factory=list, description="已记录心跳的服务 ID")
+    missing: list[str] = Field(default_factory=list, description="不存在（需要重新注册）的服务 ID")
@@ -0,0 +1,72 @@
+"""
+进程内查询缓存
+缓存读多写少的查询结果（服务注册表快照），写操作时整体失效
+"""
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Hashable
+
+from app.config import settings
+
+
+class TTLCache:
+    """
+    带过期时间的异步缓存
+
+    - 同一个 key 并发未命中时只有一个协程执行加载，其余等待结果
+    - clear() 会递增版本号，加载期间发生失效时不写入旧结果；
+      版本号同时作为缓存数据的版本，用于生成 ETag
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._data: dict[Hashable, tuple[float, Any]] = {}
+        self._locks: dict[Hashable, asyncio.Lock] = {}
+        self._version = 0
+
+    def _get_fresh(self, key: Hashable) -> tuple[bool, Any]:
+        entry = self._data.get(key)
+        if entry and entry[0] > time.monotonic():
+            return True, entry[1]
+        return False, None
+
+    async def get_or_load(
+        self,
+        key: Hashable,
+        loader: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """获取缓存值，未命中或已过期时调用 loader 加载"""
+        hit, value = self._get_fresh(key)
+        if hit:
+            return value
+
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            # 等锁期间可能已被其他协程加载
+            hit, value = self._get_fresh(key)
+            if hit:
+                return value
+
+            version = self._version
+            value = await loader()
+            if version == self._version:
+                self._data[key] = (time.monotonic() + self.ttl, value)
+            return value
+
+    @property
+    def version(self) -> int:
+        """数据版本号，每次失效时递增"""
+        return self._version
+
+    def clear(self) -> None:
+        """
+        使全部缓存失效
+        同时丢弃加载锁：锁绑定创建时的事件循环，应用在新的事件循环中重启（如测试）后不能复用
+        """
+        self._version += 1
+        self._data.clear()
+        self._locks.clear()
+
+
+# 全局查询缓存（服务注册、注销、更新、状态变化以及依赖关系变化时失效）
+query_cache = TTLCache(ttl=settings.query_cache_ttl)
@@ -2,14 +2,24 @@
 依赖关系业务逻辑
 处理服务间依赖关系的管理和拓扑图生成
 """
+import asyncio
 from typing import Optional
 
-from sqlalchemy import select, delete, and_
+from pydantic_core import to_json
+from sqlalchemy import select, delete
+from sqlalchemy.dialects.sqlite import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.config import settings
+from app.database import async_session_maker
 from app.models.service import Service
 from app.models.dependency import Dependency
 from app.schemas.dependency import DependencyCreate, TopologyNode, TopologyEdge, TopologyResponse
+from app.services.cache import query_cache
+
+
+# 内存数据库只有一个连接（每个连接都是独立的库），不能用多个会话并发查询
+_PARALLEL_SESSIONS = ":memory:" not in settings.database_url
 
 
 async def create_dependency(
@@ -20,33 +30,78 @@ async def create_dependency(
     创建依赖关系
     如果源服务或目标服务不存在，返回 None
     """
-    # 验证两个服务都存在
-    source = await db.get(Service, dependency_data.source_service_id)
-    target = await db.get(Service, dependency_data.target_service_id)
-
-    if not source or not target:
+    # 验证两个服务都存在（一次 IN 查询）
+    service_ids = {
+        dependency_data.source_service_id,
+        dependency_data.target_service_id,
+    }
+    result = await db.execute(
+        select(Service.id).where(Service.id.in_(service_ids))
+    )
+    if set(result.scalars().all()) != service_ids:
         return None
 
-    # 检查是否已存在相同的依赖关系
-    existing_query = select(Dependency).where(
-        and_(
-            Dependency.source_service_id == dependency_data.source_service_id,
-            Dependency.target_service_id == dependency_data.target_service_id
+    # 插入依赖关系；已存在相同的依赖关系（唯一索引冲突）时执行一次空更新，
+    # 使 RETURNING 返回现有的记录，插入和查重只需一条语句
+    insert_stmt = insert(Dependency).values(**dependency_data.model_dump())
+    upsert_stmt = (
+        insert_stmt
+        .on_conflict_do_update(
+            index_elements=["source_service_id", "target_service_id"],
+            set_={"source_service_id": insert_stmt.excluded.source_service_id},
         )
+        .returning(Dependency)
     )
-    existing_result = await db.execute(existing_query)
-    if existing_result.scalar_one_or_none():
-        # 已存在，返回现有的
-        return existing_result.scalar_one_or_none()
-
-    # 创建新的依赖关系
-    dependency = Dependency(**dependency_data.model_dump())
-    db.add(dependency)
+    dependency = (await db.scalars(upsert_stmt)).one()
     await db.commit()
-    await db.refresh(dependency)
+    query_cache.clear()
     return dependency
 
 
+async def create_dependencies_bulk(
+    db: AsyncSession,
+    dependencies_data: list[DependencyCreate]
+) -> int:
+    """
+    批量创建依赖关系（启动时预加载使用）
+    一次查询校验涉及的服务，一条 INSERT 写入全部依赖关系并一次提交；
+    源服务或目标服务不存在的条目被跳过，已存在的依赖关系保持不变。
+    返回有效的依赖关系数量
+    """
+    service_ids = {
+        service_id
+        for dep in dependencies_data
+        for service_id in (dep.source_service_id, dep.target_service_id)
+    }
+    if not service_ids:
+        return 0
+
+    result = await db.execute(
+        select(Service.id).where(Service.id.in_(service_ids))
+    )
+    existing_ids = set(result.scalars().all())
+
+    # 同一对服务只保留第一条
+    rows: dict[tuple[str, str], dict] = {}
+    for dep in dependencies_data:
+        key = (dep.source_service_id, dep.target_service_id)
+        if key[0] in existing_ids and key[1] in existing_ids:
+            rows.setdefault(key, dep.model_dump())
+    if not rows:
+        return 0
+
+    await db.execute(
+        insert(Dependency)
+        .values(list(rows.values()))
+        .on_conflict_do_nothing(
+            index_elements=["source_service_id", "target_service_id"]
+        )
+    )
+    await db.commit()
+    query_cache.clear()
+    return len(rows)
+
+
 async def delete_dependency(db: AsyncSession, dependency_id: int) -> bool:
     """
     删除依赖关系
@@ -55,14 +110,27 @@ async def delete_dependency(db: AsyncSession, dependency_id: int) -> bool:
         delete(Dependency).where(Dependency.id == dependency_id)
     )
     await db.commit()
+    if result.rowcount:
+        query_cache.clear()
     return result.rowcount > 0
 
 
-async def get_all_dependencies(db: AsyncSession) -> list[Dependency]:
+async def get_all_dependencies(
+    db: AsyncSession,
+    limit: Optional[int] = None,
+    offset: int = 0
+) -> list[Dependency]:
     """
     获取所有依赖关系
+    指定 limit 时分页返回，避免一次加载全部数据
     """
-    query = select(Dependency).order_by(Dependency.created_at.desc())
+    query = select(Dependency).order_by(
+        Dependency.created_at.desc(), Dependency.id.desc()
+    )
+    if limit is not None:
+        query = query.limit(limit)
+    if offset:
+        query = query.offset(offset)
     result = await db.execute(query)
     return list(result.scalars().all())
 
@@ -90,18 +158,43 @@ async def get_service_dependencies(
     return list(result.scalars().all())
 
 
-async def get_topology(db: AsyncSession) -> TopologyResponse:
+async def get_topology_json() -> bytes:
+    """
+    获取序列化后的拓扑图 JSON（带缓存）
+    结果存放在查询缓存中，与其他查询结果一样按有效期过期，并随服务或依赖关系的写操作失效
+    """
+    async def load() -> bytes:
+        return to_json(await get_topology())
+
+    return await query_cache.get_or_load("topology_json", load)
+
+
+async def get_topology() -> TopologyResponse:
     """
     获取服务依赖拓扑图数据
     返回节点和边的数据，用于前端可视化
     """
-    # 获取所有服务作为节点
-    services_query = select(Service)
-    services_result = await db.execute(services_query)
-    services = services_result.scalars().all()
+    # 只查询拓扑图需要的列，直接使用行元组，不构建 ORM 对象
+    services_query = select(Service.id, Service.name, Service.status, Service.is_gateway)
+    dependencies_query = select(
+        Dependency.source_service_id,
+        Dependency.target_service_id,
+        Dependency.description,
+    )
+    if _PARALLEL_SESSIONS:
+        # 服务（节点）和依赖关系（边）互不相关，
+        # 一个会话不能并发执行查询，因此各用一个独立会话同时查询
+        services, dependencies = await asyncio.gather(
+            _fetch_rows(services_query), _fetch_rows(dependencies_query)
+        )
+    else:
+        async with async_session_maker() as db:
+            services = (await db.execute(services_query)).all()
+            dependencies = (await db.execute(dependencies_query)).all()
 
+    # 数据来自数据库（写入时已校验），使用 model_construct 跳过重复校验
     nodes = [
-        TopologyNode(
+        TopologyNode.model_construct(
             id=s.id,
             name=s.name,
             status=s.status,
@@ -110,13 +203,8 @@ async def get_topology(db: AsyncSession) -> TopologyResponse:
         for s in services
     ]
 
-    # 获取所有依赖关系作为边
-    deps_query = select(Dependency)
-    deps_result = await db.execute(deps_query)
-    dependencies = deps_result.scalars().all()
-
     edges = [
-        TopologyEdge(
+        TopologyEdge.model_construct(
             source=d.source_service_id,
             target=d.target_service_id,
             description=d.description
@@ -124,4 +212,11 @@ async def get_topology(db: AsyncSession) -> TopologyResponse:
         for d in dependencies
     ]
 
-    return TopologyResponse(nodes=nodes, edges=edges)
+    return TopologyResponse.model_construct(nodes=nodes, edges=edges)
+
+
+async def _fetch_rows(query) -> list:
+    """在独立会话中执行查询并返回全部行"""
+    async with async_session_maker() as db:
+        result = await db.execute(query)
+        return list(result.all())
@@ -4,10 +4,10 @@
 """
 from typing import Optional
 
-from sqlalchemy import select, func
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.service import Service
+from app.services.registry_cache import get_registry
 
 
 async def discover_service(db: AsyncSession, service_id: str) -> Optional[Service]:
@@ -15,7 +15,8 @@ async def discover_service(db: AsyncSession, service_id: str) -> Optional[Servic
     发现指定服务
     只返回状态为 healthy 的服务
     """
-    service = await db.get(Service, service_id)
+    registry = await get_registry()
+    service = registry.by_id.get(service_id)
     if service and service.status == "healthy":
         return service
     return None
@@ -25,57 +26,21 @@ async def discover_all_healthy(db: AsyncSession) -> list[Service]:
     """
     发现所有健康的服务
     """
-    query = select(Service).where(Service.status == "healthy")
-    result = await db.execute(query)
-    return list(result.scalars().all())
+    registry = await get_registry()
+    return list(registry.by_status.get("healthy", []))
 
 
 async def get_gateways(db: AsyncSession) -> list[Service]:
     """
     获取所有网关服务
     """
-    query = select(Service).where(Service.is_gateway == True)
-    result = await db.execute(query)
-    return list(result.scalars().all())
+    registry = await get_registry()
+    return list(registry.gateways)
 
 
 async def get_service_stats(db: AsyncSession) -> dict:
     """
-    获取服务统计信息
+    获取服务统计信息（由注册表快照计算，不查询数据库）
     """
-    # 总服务数
-    total_query = select(func.count()).select_from(Service)
-    total_result = await db.execute(total_query)
-    total = total_result.scalar() or 0
-
-    # 健康服务数
-    healthy_query = select(func.count()).select_from(Service).where(
-        Service.status == "healthy"
-    )
-    healthy_result = await db.execute(healthy_query)
-    healthy = healthy_result.scalar() or 0
-
-    # 不健康服务数
-    unhealthy_query = select(func.count()).select_from(Service).where(
-        Service.status == "unhealthy"
-    )
-    unhealthy_result = await db.execute(unhealthy_query)
-    unhealthy = unhealthy_result.scalar() or 0
-
-    # 未知状态服务数
-    unknown = total - healthy - unhealthy
-
-    # 网关数
-    gateway_query = select(func.count()).select_from(Service).where(
-        Service.is_gateway == True
-    )
-    gateway_result = await db.execute(gateway_query)
-    gateways = gateway_result.scalar() or 0
-
-    return {
-        "total": total,
-        "healthy": healthy,
-        "unhealthy": unhealthy,
-        "unknown": unknown,
-        "gateways": gateways,
-    }
+    registry = await get_registry()
+    return dict(registry.stats)
@@ -4,7 +4,7 @@
 """
 from typing import Optional
 
-from sqlalchemy import select, delete, and_
+from sqlalchemy import Row, select, delete, and_, insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.service import Service
@@ -36,10 +36,46 @@ async def create_route(
     route = Route(**route_data.model_dump())
     db.add(route)
     await db.commit()
-    await db.refresh(route)
     return route
 
 
+async def create_routes_bulk(
+    db: AsyncSession,
+    routes_data: list[RouteCreate]
+) -> int:
+    """
+    批量创建路由规则（启动时预加载使用）
+    一次查询校验涉及的服务，一条 executemany INSERT 写入全部规则并一次提交；
+    校验规则与 create_route 相同，不满足的条目被跳过。
+    返回创建的规则数量
+    """
+    service_ids = {
+        service_id
+        for route in routes_data
+        for service_id in (route.gateway_service_id, route.target_service_id)
+    }
+    if not service_ids:
+        return 0
+
+    result = await db.execute(
+        select(Service.id, Service.is_gateway).where(Service.id.in_(service_ids))
+    )
+    is_gateway = dict(result.all())
+
+    rows = [
+        route.model_dump()
+        for route in routes_data
+        if is_gateway.get(route.gateway_service_id)
+        and route.target_service_id in is_gateway
+    ]
+    if not rows:
+        return 0
+
+    await db.execute(insert(Route), rows)
+    await db.commit()
+    return len(rows)
+
+
 async def update_route(
     db: AsyncSession,
     route_id: int,
@@ -64,7 +100,6 @@ async def update_route(
         setattr(route, field, value)
 
     await db.commit()
-    await db.refresh(route)
     return route
 
 
@@ -103,13 +138,29 @@ async def get_all_routes(
     if enabled_only:
         query = query.where(Route.enabled == True)
 
-    # 按优先级降序排序
-    query = query.order_by(Route.priority.desc(), Route.created_at.desc())
+    # 按优先级降序排序（created_at 精度只到秒，同一秒创建的规则按 ID 降序，后创建的优先）
+    query = query.order_by(
+        Route.priority.desc(), Route.created_at.desc(), Route.id.desc()
+    )
 
     result = await db.execute(query)
     return list(result.scalars().all())
 
 
+async def get_route_rows(db: AsyncSession, gateway_id: str) -> list[Row]:
+    """
+    获取网关启用的路由规则（按优先级降序）
+    只读场景使用：返回与 Route 字段同名的行元组，不构建 ORM 对象
+    """
+    query = (
+        select(*Route.__table__.c)
+        .where(Route.gateway_service_id == gateway_id, Route.enabled == True)
+        .order_by(Route.priority.desc(), Route.created_at.desc(), Route.id.desc())
+    )
+    result = await db.execute(query)
+    return list(result.all())
+
+
 async def get_matching_route(
     db: AsyncSession,
     gateway_id: str,
@@ -6,13 +6,20 @@ import asyncio
 from datetime import datetime, timedelta
 from typing import Optional
 
-import httpx
-from sqlalchemy import select
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import case, select, update
 
 from app.config import settings
+from app.core.http_client import get_http_client
 from app.database import async_session_maker
 from app.models.service import Service
+from app.services.cache import query_cache
+from app.services.registry_cache import get_registry
+
+
+# 健康检查响应体最多读取的字节数
+# 判断健康只需要状态码：小响应体读完以便连接回到连接池复用，
+# 超出上限则直接丢弃该连接，避免把误配置的大页面整体读入内存
+HEALTH_BODY_LIMIT = 64 * 1024
 
 
 async def check_service_health(service: Service) -> bool:
@@ -22,38 +29,18 @@ async def check_service_health(service: Service) -> bool:
     返回 True 表示健康，False 表示不健康
     """
     try:
-        async with httpx.AsyncClient(timeout=settings.health_check_timeout) as client:
-            response = await client.get(service.health_url)
+        async with get_http_client().stream("GET", service.health_url) as response:
+            received = 0
+            async for chunk in response.aiter_raw():
+                received += len(chunk)
+                if received > HEALTH_BODY_LIMIT:
+                    break
             # 2xx 状态码认为是健康的
             return 200 <= response.status_code < 300
     except Exception:
         return False
 
 
-async def update_service_status(
-    db: AsyncSession,
-    service: Service,
-    is_healthy: bool
-) -> None:
-    """
-    更新服务的健康状态
-    根据检查结果和连续失败次数更新状态
-    """
-    if is_healthy:
-        # 健康，重置失败计数
-        service.status = "healthy"
-        service.consecutive_failures = 0
-    else:
-        # 不健康，增加失败计数
-        service.consecutive_failures += 1
-
-        # 超过阈值则标记为不健康
-        if service.consecutive_failures >= settings.unhealthy_threshold:
-            service.status = "unhealthy"
-
-    await db.commit()
-
-
 async def check_all_services() -> dict:
     """
     检查所有注册服务的健康状态
@@ -64,25 +51,57 @@ async def check_all_services() -> dict:
         query = select(Service)
         result = await db.execute(query)
         services = result.scalars().all()
+        # 结束读事务并归还连接，网络检查期间不占用数据库连接
+        # （expire_on_commit=False，已加载的对象仍可用于读取健康检查地址）
+        await db.commit()
 
-        checked = 0
-        healthy = 0
-        unhealthy = 0
-
-        for service in services:
-            is_healthy = await check_service_health(service)
-            await update_service_status(db, service, is_healthy)
-
-            checked += 1
-            if is_healthy:
-                healthy += 1
-            else:
-                unhealthy += 1
+        # 并发检查，信号量限制同时进行的请求数
+        semaphore = asyncio.Semaphore(settings.health_check_concurrency)
+
+        async def check_one(service: Service) -> bool:
+            async with semaphore:
+                return await check_service_health(service)
+
+        results = await asyncio.gather(*(check_one(s) for s in services))
+
+        healthy_ids = [s.id for s, ok in zip(services, results) if ok]
+        unhealthy_ids = [s.id for s, ok in zip(services, results) if not ok]
+
+        # 用 UPDATE 写入结果，失败计数在数据库中累加：
+        # 检查期间被注销的服务只是匹配不到行，期间心跳对失败计数的重置也不会被覆盖
+        if healthy_ids:
+            await db.execute(
+                update(Service)
+                .where(Service.id.in_(healthy_ids))
+                .values(status="healthy", consecutive_failures=0)
+                .execution_options(synchronize_session=False)
+            )
+        if unhealthy_ids:
+            # 连续失败次数达到阈值则标记为不健康
+            failures = Service.consecutive_failures + 1
+            await db.execute(
+                update(Service)
+                .where(Service.id.in_(unhealthy_ids))
+                .values(
+                    consecutive_failures=failures,
+                    status=case(
+                        (failures >= settings.unhealthy_threshold, "unhealthy"),
+                        else_=Service.status,
+                    ),
+                )
+                .execution_options(synchronize_session=False)
+            )
+
+        # 所有状态变化在一个事务中提交
+        await db.commit()
+        query_cache.clear()
+        # 预热注册表快照，避免检查后的第一个读请求承担加载开销
+        await get_registry()
 
         return {
-            "checked": checked,
-            "healthy": healthy,
-            "unhealthy": unhealthy,
+            "checked": len(services),
+            "healthy": len(healthy_ids),
+            "unhealthy": len(unhealthy_ids),
             "timestamp": datetime.utcnow().isoformat()
         }
 
@@ -98,18 +117,19 @@ async def check_heartbeat_timeout() -> int:
             seconds=settings.heartbeat_timeout
         )
 
-        # 查找心跳超时的服务
-        query = select(Service).where(
-            Service.last_heartbeat < timeout_threshold,
-            Service.status != "unhealthy"
+        # 一条 UPDATE 标记所有心跳超时的服务
+        result = await db.execute(
+            update(Service)
+            .where(
+                Service.last_heartbeat < timeout_threshold,
+                Service.status != "unhealthy"
+            )
+            .values(status="unhealthy")
+            .execution_options(synchronize_session=False)
         )
-        result = await db.execute(query)
-        services = result.scalars().all()
-
-        count = 0
-        for service in services:
-            service.status = "unhealthy"
-            count += 1
-
         await db.commit()
+
+        count = result.rowcount
+        if count:
+            query_cache.clear()
         return count
@@ -0,0 +1,122 @@
+"""
+心跳写入合并
+已处于 healthy 状态的服务上报心跳时只需要刷新时间戳：先记录在内存中，
+由后台任务定期用一条 executemany UPDATE 批量写入，
+提交次数从每次心跳一次降为每个刷新周期一次
+"""
+import asyncio
+from datetime import datetime
+from typing import Iterable, Optional
+
+from sqlalchemy import bindparam, update
+
+from app.config import settings
+from app.database import async_session_maker
+from app.models.service import Service
+
+
+# 待写入的心跳：service_id -> 最后心跳时间
+pending: dict[str, datetime] = {}
+
+# 正在写入的心跳（flush 期间换出的缓冲区，提交完成前数据库中还是旧值）
+_flushing: dict[str, datetime] = {}
+
+# 心跳版本号：每次记录心跳时递增（心跳不使查询缓存失效，
+# 包含心跳时间的接口需要把它计入 ETag）
+version = 0
+
+_flush_task: Optional[asyncio.Task] = None
+
+# 按主键批量更新心跳时间并重置失败计数
+# 使用 Core UPDATE：期间被注销的服务只是匹配不到行，不会让整批写入失败
+_heartbeat_update = (
+    update(Service.__table__)
+    .where(Service.__table__.c.id == bindparam("b_id"))
+    .values(last_heartbeat=bindparam("b_ts"), consecutive_failures=0)
+)
+
+
+def record(service_id: str) -> datetime:
+    """记录一次心跳，返回心跳时间"""
+    global version
+    version += 1
+    now = datetime.utcnow()
+    pending[service_id] = now
+    return now
+
+
+def take(service_id: str) -> Optional[datetime]:
+    """
+    取出某个服务待写入的心跳时间（没有时返回 None）
+    服务信息被更新时由调用方随同一事务写入，避免更新后的数据和重建的快照中心跳时间是旧的
+    """
+    return pending.pop(service_id, None)
+
+
+def apply_pending(services: Iterable[Service]) -> None:
+    """
+    把尚未写入数据库的心跳覆盖到刚从数据库加载的服务上
+    注册表快照重新加载时调用，避免快照中的心跳时间回退到落库前的旧值
+    """
+    if not pending and not _flushing:
+        return
+    for service in services:
+        ts = pending.get(service.id) or _flushing.get(service.id)
+        if ts is not None and (service.last_heartbeat is None or ts > service.last_heartbeat):
+            service.last_heartbeat = ts
+            service.consecutive_failures = 0
+
+
+async def flush() -> int:
+    """将缓冲区中的心跳写入数据库，返回写入的服务数量"""
+    global pending, _flushing
+    if not pending:
+        return 0
+
+    # 先整体换出缓冲区，写入期间到达的心跳进入新的缓冲区
+    snapshot, pending = pending, {}
+    _flushing = snapshot
+    try:
+        async with async_session_maker() as db:
+            await db.execute(
+                _heartbeat_update,
+                [{"b_id": k, "b_ts": v} for k, v in snapshot.items()]
+            )
+            await db.commit()
+    except Exception:
+        # 写入失败时放回缓冲区，新到达的心跳时间优先
+        snapshot.update(pending)
+        pending = snapshot
+        raise
+    finally:
+        _flushing = {}
+    return len(snapshot)
+
+
+async def _flush_loop() -> None:
+    while True:
+        await asyncio.sleep(settings.heartbeat_flush_interval)
+        try:
+            await flush()
+        except Exception as e:
+            print(f"心跳批量写入失败: {e}")
+
+
+def start_heartbeat_flusher() -> None:
+    """启动后台刷新任务（应用启动时调用）"""
+    global _flush_task
+    if _flush_task is None or _flush_task.done():
+        _flush_task = asyncio.create_task(_flush_loop())
+
+
+async def stop_heartbeat_flusher() -> None:
+    """停止后台刷新任务并写入剩余心跳（应用关闭时调用）"""
+    global _flush_task
+    if _flush_task is not None:
+        _flush_task.cancel()
+        try:
+            await _flush_task
+        except asyncio.CancelledError:
+            pass
+        _flush_task = None
+    await flush()
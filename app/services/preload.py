@@ -2,12 +2,22 @@
 配置文件加载器
 支持从 services.yaml 加载预注册的服务、依赖和路由
 """
+import copy
 from pathlib import Path
 from typing import Optional
 import yaml
 
 from app.config import BASE_DIR
 
+# 优先使用 libyaml 实现的 C 加载器，未编译 libyaml 时回退到纯 Python 实现
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
+
+# 上次解析的配置：((路径, 修改时间, 文件大小), 配置字典)
+_config_cache: Optional[tuple[tuple, dict]] = None
+
 
 def load_services_config(config_path: Optional[Path] = None) -> dict:
     """
@@ -19,6 +29,7 @@ def load_services_config(config_path: Optional[Path] = None) -> dict:
     Returns:
         配置字典，包含 services, dependencies, routes
     """
+    global _config_cache
     if config_path is None:
         config_path = BASE_DIR / "services.yaml"
 
@@ -26,25 +37,34 @@ def load_services_config(config_path: Optional[Path] = None) -> dict:
         return {"services": [], "dependencies": [], "routes": []}
 
     try:
+        # 文件未变化（修改时间和大小相同）时直接复用上次的解析结果
+        stat = config_path.stat()
+        key = (str(config_path), stat.st_mtime_ns, stat.st_size)
+        if _config_cache is not None and _config_cache[0] == key:
+            return copy.deepcopy(_config_cache[1])
+
         with open(config_path, "r", encoding="utf-8") as f:
-            config = yaml.safe_load(f) or {}
+            config = yaml.load(f, Loader=_YamlLoader) or {}
 
-        return {
+        result = {
             "services": config.get("services", []) or [],
             "dependencies": config.get("dependencies", []) or [],
             "routes": config.get("routes", []) or [],
         }
+        _config_cache = (key, result)
+        return copy.deepcopy(result)
     except Exception as e:
         print(f"[ServiceAtlas] 加载配置文件失败: {e}")
         return {"services": [], "dependencies": [], "routes": []}
 
 
-async def preload_services(db_session):
+async def preload_services(db_session, extra_services: Optional[list] = None):
     """
     预加载配置文件中的服务到数据库
 
     Args:
         db_session: 数据库会话
+        extra_services: 需要一并注册的其他服务（ServiceCreate 列表，如自注册服务）
     """
     from app.schemas.service import ServiceCreate
     from app.schemas.dependency import DependencyCreate
@@ -55,11 +75,11 @@ async def preload_services(db_session):
 
     config = load_services_config()
 
-    # 预注册服务
-    services_count = 0
+    # 预注册服务：逐个校验配置，再一次性批量写入
+    services_data = []
     for svc in config["services"]:
         try:
-            service_data = ServiceCreate(
+            services_data.append(ServiceCreate(
                 id=svc["id"],
                 name=svc["name"],
                 host=svc["host"],
@@ -68,32 +88,46 @@ async def preload_services(db_session):
                 health_check_path=svc.get("health_check_path", "/health"),
                 is_gateway=svc.get("is_gateway", False),
                 service_meta=svc.get("metadata"),
-            )
-            await registry_service.register_service(db_session, service_data)
-            services_count += 1
+            ))
         except Exception as e:
             print(f"[ServiceAtlas] 预注册服务 '{svc.get('id', '?')}' 失败: {e}")
+    services_data.extend(extra_services or [])
 
-    # 预创建依赖关系
-    deps_count = 0
+    services_count = 0
+    try:
+        services_count = await registry_service.register_services_bulk(
+            db_session, services_data
+        )
+    except Exception as e:
+        await db_session.rollback()
+        print(f"[ServiceAtlas] 预注册服务失败: {e}")
+
+    # 预创建依赖关系：逐个校验配置，再一次性批量写入
+    dependencies_data = []
     for dep in config["dependencies"]:
         try:
-            dep_data = DependencyCreate(
+            dependencies_data.append(DependencyCreate(
                 source_service_id=dep["source"],
                 target_service_id=dep["target"],
                 description=dep.get("description"),
-            )
-            result = await dependency_service.create_dependency(db_session, dep_data)
-            if result:
-                deps_count += 1
+            ))
         except Exception as e:
             print(f"[ServiceAtlas] 预创建依赖关系失败: {e}")
 
-    # 预创建路由规则
-    routes_count = 0
+    deps_count = 0
+    try:
+        deps_count = await dependency_service.create_dependencies_bulk(
+            db_session, dependencies_data
+        )
+    except Exception as e:
+        await db_session.rollback()
+        print(f"[ServiceAtlas] 预创建依赖关系失败: {e}")
+
+    # 预创建路由规则：逐个校验配置，再一次性批量写入
+    routes_data = []
     for route in config["routes"]:
         try:
-            route_data = RouteCreate(
+            routes_data.append(RouteCreate(
                 gateway_service_id=route["gateway"],
                 path_pattern=route["path_pattern"],
                 target_service_id=route["target"],
@@ -101,12 +135,18 @@ async def preload_services(db_session):
                 strip_path=route.get("strip_path"),
                 priority=route.get("priority", 0),
                 auth_config=route.get("auth_config"),  # 支持认证配置
-            )
-            result = await gateway_service.create_route(db_session, route_data)
-            if result:
-                routes_count += 1
+            ))
         except Exception as e:
             print(f"[ServiceAtlas] 预创建路由规则失败: {e}")
 
+    routes_count = 0
+    try:
+        routes_count = await gateway_service.create_routes_bulk(
+            db_session, routes_data
+        )
+    except Exception as e:
+        await db_session.rollback()
+        print(f"[ServiceAtlas] 预创建路由规则失败: {e}")
+
     if services_count > 0 or deps_count > 0 or routes_count > 0:
         print(f"[ServiceAtlas] 预加载完成: {services_count} 个服务, {deps_count} 个依赖, {routes_count} 条路由")
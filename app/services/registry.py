@@ -2,31 +2,41 @@
 服务注册业务逻辑
 处理服务的注册、注销、更新等操作
 """
+import os
 import re
-import uuid
 from datetime import datetime
-from typing import Optional
+from typing import Iterable, Optional
 
-from sqlalchemy import select, delete
+from sqlalchemy import select, delete, update
+from sqlalchemy.dialects.sqlite import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.service import Service
 from app.models.route import Route
 from app.schemas.service import ServiceCreate, ServiceUpdate
+from app.services import heartbeat_buffer
+from app.services.cache import query_cache
+from app.services.registry_cache import get_registry
+
+
+# 服务 ID 规范化使用的正则
+_NON_ALNUM_RE = re.compile(r'[^a-zA-Z0-9\s-]')
+_SEPARATOR_RE = re.compile(r'[\s_]+')
+_DASHES_RE = re.compile(r'-+')
 
 
 def generate_service_id(name: str) -> str:
     """
     根据服务名称生成唯一ID
 
-    格式：{normalized_name}-{short_uuid}
+    格式：{normalized_name}-{random_hex}
     例如：deckview-a1b2c3d4
     """
     # 将名称转换为 URL 友好的格式
     # 移除非字母数字字符，转小写，用连字符替换空格
-    normalized = re.sub(r'[^a-zA-Z0-9\s-]', '', name.lower())
-    normalized = re.sub(r'[\s_]+', '-', normalized)
-    normalized = re.sub(r'-+', '-', normalized).strip('-')
+    normalized = _NON_ALNUM_RE.sub('', name.lower())
+    normalized = _SEPARATOR_RE.sub('-', normalized)
+    normalized = _DASHES_RE.sub('-', normalized).strip('-')
 
     # 如果名称为空，使用 'service'
     if not normalized:
@@ -35,19 +45,26 @@ def generate_service_id(name: str) -> str:
     # 截取前20个字符，确保总长度不超过64
     normalized = normalized[:20]
 
-    # 添加短UUID（8位）
-    short_uuid = uuid.uuid4().hex[:8]
+    # 添加 8 位随机十六进制后缀（32 位随机数）
+    short_id = os.urandom(4).hex()
 
-    return f"{normalized}-{short_uuid}"
+    return f"{normalized}-{short_id}"
 
 
-async def register_service(db: AsyncSession, service_data: ServiceCreate) -> Service:
+async def register_service(
+    db: AsyncSession,
+    service_data: ServiceCreate,
+    heartbeat: bool = False
+) -> Service:
     """
     注册新服务
     - 如果未提供 ID，自动生成唯一ID
     - 如果提供了 ID 且已存在，更新该服务信息
     - 自动为非网关服务创建默认路由规则
+    - heartbeat=True 时注册同时视为一次心跳，状态直接设为 healthy
     """
+    status = "healthy" if heartbeat else "unknown"
+
     # 如果未提供 ID，自动生成
     service_id = service_data.id
     if not service_id:
@@ -62,8 +79,10 @@ async def register_service(db: AsyncSession, service_data: ServiceCreate) -> Ser
         data_dict.pop('id', None)  # 不更新 ID
         for field, value in data_dict.items():
             setattr(existing, field, value)
+        # 重新注册时刷新心跳时间，缓冲区中更早的心跳不再写入
+        heartbeat_buffer.take(service_id)
         existing.last_heartbeat = datetime.utcnow()
-        existing.status = "unknown"  # 重新注册后重置状态
+        existing.status = status  # 重新注册后重置状态
         existing.consecutive_failures = 0
 
         # 网关服务重新注册时，检查并补充创建路由
@@ -71,7 +90,9 @@ async def register_service(db: AsyncSession, service_data: ServiceCreate) -> Ser
             await _create_routes_for_existing_services(db, existing)
 
         await db.commit()
-        await db.refresh(existing)
+        query_cache.clear()
+        if "is_gateway" in data_dict:
+            _invalidate_gateway_id()
         return existing
     else:
         # 创建新服务
@@ -86,9 +107,8 @@ async def register_service(db: AsyncSession, service_data: ServiceCreate) -> Ser
             is_gateway=service_data.is_gateway,
             base_path=service_data.base_path,  # 可能为 None
             service_meta=service_data.service_meta,
-            registered_at=datetime.utcnow(),
             last_heartbeat=datetime.utcnow(),
-            status="unknown",
+            status=status,
             consecutive_failures=0,
         )
         db.add(service)
@@ -102,7 +122,9 @@ async def register_service(db: AsyncSession, service_data: ServiceCreate) -> Ser
             await _create_routes_for_existing_services(db, service)
 
         await db.commit()
-        await db.refresh(service)
+        query_cache.clear()
+        if service_data.is_gateway:
+            _invalidate_gateway_id()
         return service
 
 
@@ -116,16 +138,40 @@ async def _create_default_route(db: AsyncSession, service: Service):
     认证服务（service_type="authentication"）默认不添加 auth_config。
     """
     # 查找网关服务（如果有多个，选第一个）
-    result = await db.execute(
-        select(Service).where(Service.is_gateway == True).limit(1)
-    )
-    gateway = result.scalar_one_or_none()
+    gateway_id = await _get_gateway_id(db)
 
-    if not gateway:
+    if not gateway_id:
         # 没有网关服务，不创建路由
         return
 
-    await _create_route_for_service(db, gateway, service)
+    await _create_route_for_service(db, gateway_id, service)
+
+
+# 默认路由使用的网关 ID，网关可能发生变化的写操作提交后清空
+_gateway_id_cache: Optional[str] = None
+_gateway_id_version = 0
+
+
+async def _get_gateway_id(db: AsyncSession) -> Optional[str]:
+    """获取默认路由使用的网关 ID，未缓存时查询数据库"""
+    global _gateway_id_cache
+    if _gateway_id_cache is None:
+        version = _gateway_id_version
+        result = await db.execute(
+            select(Service.id).where(Service.is_gateway == True).limit(1)
+        )
+        gateway_id = result.scalar_one_or_none()
+        # 查询期间网关发生变化则不缓存旧结果
+        if version == _gateway_id_version:
+            _gateway_id_cache = gateway_id
+        return gateway_id
+    return _gateway_id_cache
+
+
+def _invalidate_gateway_id() -> None:
+    global _gateway_id_cache, _gateway_id_version
+    _gateway_id_version += 1
+    _gateway_id_cache = None
 
 
 async def _create_routes_for_existing_services(db: AsyncSession, gateway: Service):
@@ -145,44 +191,147 @@ async def _create_routes_for_existing_services(db: AsyncSession, gateway: Servic
     services = result.scalars().all()
 
     for service in services:
-        await _create_route_for_service(db, gateway, service)
+        await _create_route_for_service(db, gateway.id, service)
 
 
-async def _create_route_for_service(db: AsyncSession, gateway: Service, service: Service):
+async def _create_route_for_service(db: AsyncSession, gateway_id: str, service: Service):
     """
     为单个服务创建默认路由规则
 
     路由模式：/{service_id}/** → 该服务
     """
-    # 检查是否已存在该服务的路由
+    # 检查是否已存在该服务的路由（只探测是否存在，不加载路由对象）
     existing_route = await db.execute(
-        select(Route).where(Route.target_service_id == service.id)
+        select(Route.id).where(Route.target_service_id == service.id).limit(1)
     )
-    if existing_route.scalar_one_or_none():
+    if existing_route.first():
         # 已存在路由，不重复创建
         return
 
+    db.add(_new_default_route(gateway_id, service.id, service.service_meta))
+
+
+def _new_default_route(
+    gateway_id: str,
+    service_id: str,
+    service_meta: Optional[dict]
+) -> Route:
+    """构建服务的默认路由规则（/{service_id}/** → 该服务）"""
     # 从 service_meta 中提取认证配置
     auth_config = None
-    service_meta = service.service_meta or {}
+    service_meta = service_meta or {}
 
     # 认证服务本身不需要被其他认证服务保护
     if service_meta.get("service_type") != "authentication":
         # 检查服务是否声明了认证需求
         auth_config = service_meta.get("auth_config")
 
-    # 创建默认路由
-    route = Route(
-        gateway_service_id=gateway.id,
-        path_pattern=f"/{service.id}/**",
-        target_service_id=service.id,
+    return Route(
+        gateway_service_id=gateway_id,
+        path_pattern=f"/{service_id}/**",
+        target_service_id=service_id,
         strip_prefix=True,
-        strip_path=f"/{service.id}",
+        strip_path=f"/{service_id}",
         priority=10,
         enabled=True,
         auth_config=auth_config,
     )
-    db.add(route)
+
+
+async def register_services_bulk(
+    db: AsyncSession,
+    services_data: list[ServiceCreate]
+) -> int:
+    """
+    批量注册服务（启动时预加载使用）
+    用一条 INSERT ... ON CONFLICT DO UPDATE 写入全部服务并一次提交，效果与逐个调用
+    register_service 相同：已存在的服务更新信息并重置状态，并补充创建默认路由。
+    返回写入的服务数量
+    """
+    rows: dict[str, dict] = {}
+    base_path_unset: set[str] = set()
+    now = datetime.utcnow()
+    for service_data in services_data:
+        row = service_data.model_dump()
+        row["id"] = service_data.id or generate_service_id(service_data.name)
+        row.update(last_heartbeat=now, status="unknown", consecutive_failures=0)
+        rows[row["id"]] = row
+        if "base_path" in service_data.model_fields_set:
+            base_path_unset.discard(row["id"])
+        else:
+            base_path_unset.add(row["id"])
+    if not rows:
+        return 0
+
+    existing_result = await db.execute(
+        select(Service.id, Service.base_path).where(Service.id.in_(rows))
+    )
+    existing_base_paths = dict(existing_result.all())
+    existing_ids = set(existing_base_paths)
+
+    # base_path 只有在明确指定时才更新，未指定时沿用已有的值
+    for service_id in base_path_unset & existing_ids:
+        rows[service_id]["base_path"] = existing_base_paths[service_id]
+
+    insert_stmt = insert(Service).values(list(rows.values()))
+    excluded = insert_stmt.excluded
+    await db.execute(
+        insert_stmt.on_conflict_do_update(
+            index_elements=["id"],
+            set_={
+                "name": excluded.name,
+                "host": excluded.host,
+                "port": excluded.port,
+                "protocol": excluded.protocol,
+                "health_check_path": excluded.health_check_path,
+                "is_gateway": excluded.is_gateway,
+                "base_path": excluded.base_path,
+                "service_meta": excluded.service_meta,
+                "last_heartbeat": excluded.last_heartbeat,
+                "status": excluded.status,
+                "consecutive_failures": excluded.consecutive_failures,
+            },
+        )
+    )
+
+    # 补充默认路由：本批中有网关时为所有非网关服务补建路由，
+    # 否则只为新注册的非网关服务创建指向已有网关的路由
+    gateway_ids = [service_id for service_id, row in rows.items() if row["is_gateway"]]
+    if gateway_ids:
+        gateway_id = gateway_ids[0]
+        result = await db.execute(
+            select(Service.id, Service.service_meta).where(Service.is_gateway == False)
+        )
+        candidates = {service_id: meta for service_id, meta in result.all()}
+    else:
+        result = await db.execute(
+            select(Service.id).where(Service.is_gateway == True).limit(1)
+        )
+        gateway_id = result.scalar_one_or_none()
+        candidates = {
+            service_id: row["service_meta"]
+            for service_id, row in rows.items()
+            if service_id not in existing_ids and not row["is_gateway"]
+        }
+
+    if gateway_id and candidates:
+        routed_result = await db.execute(
+            select(Route.target_service_id).where(
+                Route.target_service_id.in_(candidates)
+            )
+        )
+        routed_ids = set(routed_result.scalars().all())
+        db.add_all(
+            _new_default_route(gateway_id, service_id, meta)
+            for service_id, meta in candidates.items()
+            if service_id not in routed_ids
+        )
+
+    await db.commit()
+    query_cache.clear()
+    if gateway_ids:
+        _invalidate_gateway_id()
+    return len(rows)
 
 
 async def unregister_service(db: AsyncSession, service_id: str) -> bool:
@@ -194,6 +343,8 @@ async def unregister_service(db: AsyncSession, service_id: str) -> bool:
         delete(Service).where(Service.id == service_id)
     )
     await db.commit()
+    query_cache.clear()
+    _invalidate_gateway_id()
     return result.rowcount > 0
 
 
@@ -215,16 +366,41 @@ async def update_service(
     for field, value in update_dict.items():
         setattr(service, field, value)
 
+    # 缓冲区中尚未写入的心跳随本次更新一起写入，返回值和重建的快照中心跳时间保持最新
+    last_heartbeat = heartbeat_buffer.take(service_id)
+    if last_heartbeat is not None:
+        service.last_heartbeat = last_heartbeat
+        service.consecutive_failures = 0
+
     await db.commit()
-    await db.refresh(service)
+    query_cache.clear()
+    if "is_gateway" in update_dict:
+        _invalidate_gateway_id()
     return service
 
 
 async def get_service(db: AsyncSession, service_id: str) -> Optional[Service]:
     """
-    获取单个服务信息
+    获取单个服务信息（读取注册表快照）
+    """
+    registry = await get_registry()
+    return registry.by_id.get(service_id)
+
+
+async def get_services_by_ids(
+    db: AsyncSession,
+    service_ids: Iterable[str]
+) -> dict[str, Service]:
+    """
+    按 ID 批量获取服务
+    一次 IN 查询代替逐个 db.get，返回 {service_id: Service}
     """
-    return await db.get(Service, service_id)
+    ids = set(service_ids)
+    if not ids:
+        return {}
+
+    result = await db.execute(select(Service).where(Service.id.in_(ids)))
+    return {s.id: s for s in result.scalars()}
 
 
 async def get_all_services(
@@ -234,19 +410,14 @@ async def get_all_services(
 ) -> list[Service]:
     """
     获取服务列表，支持按状态和是否网关过滤
+    在注册表快照上过滤，按注册时间降序排列
     """
-    query = select(Service)
-
-    if status:
-        query = query.where(Service.status == status)
+    registry = await get_registry()
+    services = registry.by_status.get(status, []) if status else registry.services
 
     if is_gateway is not None:
-        query = query.where(Service.is_gateway == is_gateway)
-
-    query = query.order_by(Service.registered_at.desc())
-
-    result = await db.execute(query)
-    return list(result.scalars().all())
+        return [s for s in services if s.is_gateway == is_gateway]
+    return list(services)
 
 
 async def heartbeat(db: AsyncSession, service_id: str) -> Optional[Service]:
@@ -254,14 +425,74 @@ async def heartbeat(db: AsyncSession, service_id: str) -> Optional[Service]:
     更新服务心跳时间
     同时将状态标记为 healthy（如果之前不是）
     """
-    service = await db.get(Service, service_id)
-    if not service:
+    registry = await get_registry()
+    cached = registry.by_id.get(service_id)
+    if cached is None:
         return None
 
-    service.last_heartbeat = datetime.utcnow()
-    service.status = "healthy"
-    service.consecutive_failures = 0
+    # 已经是 healthy 的服务只需刷新时间戳：写入心跳缓冲区批量落库，
+    # 同时更新快照中的心跳时间，无需使缓存失效
+    if cached.status == "healthy":
+        cached.last_heartbeat = heartbeat_buffer.record(service_id)
+        cached.consecutive_failures = 0
+        return cached
+
+    # 状态发生变化，立即写入并使缓存失效（UPDATE ... RETURNING 一条语句完成更新和读取）
+    result = await db.scalars(
+        update(Service)
+        .where(Service.id == service_id)
+        .values(
+            last_heartbeat=datetime.utcnow(),
+            status="healthy",
+            consecutive_failures=0,
+        )
+        .returning(Service)
+    )
+    service = result.one_or_none()
+    if not service:
+        return None
 
     await db.commit()
-    await db.refresh(service)
+    query_cache.clear()
     return service
+
+
+async def heartbeat_many(
+    db: AsyncSession,
+    service_ids: Iterable[str]
+) -> tuple[list[str], list[str]]:
+    """
+    批量更新服务心跳时间
+    已是 healthy 的服务写入心跳缓冲区，其余服务用一条 UPDATE 标记为 healthy。
+    返回 (已记录心跳的服务 ID, 不存在的服务 ID)
+    """
+    registry = await get_registry()
+    accepted, missing, changed = [], [], []
+    for service_id in dict.fromkeys(service_ids):
+        cached = registry.by_id.get(service_id)
+        if cached is None:
+            missing.append(service_id)
+            continue
+        accepted.append(service_id)
+        if cached.status == "healthy":
+            cached.last_heartbeat = heartbeat_buffer.record(service_id)
+            cached.consecutive_failures = 0
+        else:
+            changed.append(service_id)
+
+    # 状态发生变化的服务立即写入并使缓存失效
+    if changed:
+        await db.execute(
+            update(Service)
+            .where(Service.id.in_(changed))
+            .values(
+                last_heartbeat=datetime.utcnow(),
+                status="healthy",
+                consecutive_failures=0,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+        query_cache.clear()
+
+    return accepted, missing
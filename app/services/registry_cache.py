@@ -0,0 +1,54 @@
+"""
+服务注册表内存快照
+一次查询加载全部服务并预先建立索引和统计，服务列表、详情、网关列表、服务发现、
+服务统计等读操作直接在内存中完成。快照存放在查询缓存中，随服务写操作一起失效。
+"""
+from sqlalchemy import select
+
+from app.database import async_session_maker
+from app.models.service import Service
+from app.services import heartbeat_buffer
+from app.services.cache import query_cache
+
+
+class ServiceRegistry:
+    """服务注册表快照（只读）"""
+
+    def __init__(self, services: list[Service]):
+        # 按注册时间降序排列的全部服务（注册时间相同时按 ID 降序）
+        self.services = services
+        self.by_id = {s.id: s for s in services}
+        self.gateways = [s for s in services if s.is_gateway]
+        self.by_status: dict[str, list[Service]] = {}
+        for s in services:
+            self.by_status.setdefault(s.status, []).append(s)
+
+        healthy = len(self.by_status.get("healthy", ()))
+        unhealthy = len(self.by_status.get("unhealthy", ()))
+        self.stats = {
+            "total": len(services),
+            "healthy": healthy,
+            "unhealthy": unhealthy,
+            "unknown": len(services) - healthy - unhealthy,
+            "gateways": len(self.gateways),
+        }
+
+
+async def get_registry() -> ServiceRegistry:
+    """获取当前服务注册表快照，过期或失效时重新加载"""
+    return await query_cache.get_or_load("registry", _load_registry)
+
+
+async def _load_registry() -> ServiceRegistry:
+    # 使用独立会话加载：快照中的对象会在多个请求间共享，
+    # 不能进入某个请求会话的 identity map，否则该请求的修改会直接写进快照
+    async with async_session_maker() as db:
+        # registered_at 由数据库生成，精度只到秒，同一秒注册的服务按 ID 排序，保证顺序稳定
+        query = select(Service).order_by(
+            Service.registered_at.desc(), Service.id.desc()
+        )
+        result = await db.execute(query)
+        services = list(result.scalars().all())
+    # 心跳缓冲区中尚未落库的心跳时间比数据库中的新
+    heartbeat_buffer.apply_pending(services)
+    return ServiceRegistry(services)
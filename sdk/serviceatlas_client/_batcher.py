@@ -0,0 +1,174 @@
+"""
+心跳调度与批量发送
+同一进程中的多个客户端共用一个后台线程发送心跳：指向同一注册中心、同时到期的客户端
+合并为一次批量心跳请求，不再各自占用一个线程、各自发送请求
+"""
+import heapq
+import itertools
+import threading
+import time
+from typing import Optional
+
+import httpx
+
+from serviceatlas_client._http import client_options
+from serviceatlas_client._log import record_heartbeat
+
+
+# 合并窗口（秒）：这段时间内将要到期的客户端提前一起发送，使启动时间相近的客户端共用一次请求
+_COALESCE_WINDOW = 1.0
+
+
+class _HeartbeatBatcher:
+    """
+    心跳批量发送器（进程内单例）
+    按下次心跳时间维护一个最小堆，后台线程睡眠到最早的到期时间，
+    每个客户端按自己的心跳间隔发送（心跳失败时按退避间隔提前重试），同一时刻到期的客户端合并发送
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # 堆元素：[下次心跳时间, 序号, 客户端]；序号保证时间相同时不比较客户端
+        self._heap: list[list] = []
+        # 客户端 -> 其当前的堆元素（移除时将元素中的客户端置为 None，出堆时丢弃）
+        self._entries: dict = {}
+        self._counter = itertools.count()
+        self._thread: Optional[threading.Thread] = None
+        # 加入更早到期的客户端或全部客户端移除时唤醒后台线程
+        self._wakeup = threading.Event()
+        # (registry_url, trust_env, http2) -> 发送批量心跳的 HTTP 客户端
+        self._http: dict[tuple[str, bool, bool], httpx.Client] = {}
+        # 不支持批量心跳接口的注册中心（旧版本），改为逐个客户端发送
+        self._unsupported: set[str] = set()
+
+    def add(self, client) -> None:
+        """加入客户端（一个心跳间隔后发送第一次心跳），必要时启动后台线程"""
+        with self._lock:
+            if client in self._entries:
+                return
+            entry = [time.monotonic() + client.heartbeat_interval, next(self._counter), client]
+            self._entries[client] = entry
+            heapq.heappush(self._heap, entry)
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="serviceatlas-heartbeat", daemon=True
+                )
+                self._thread.start()
+            elif self._heap[0] is entry:
+                self._wakeup.set()
+
+    def remove(self, client) -> None:
+        """移除客户端，不再为其发送心跳"""
+        with self._lock:
+            entry = self._entries.pop(client, None)
+            if entry is not None:
+                entry[2] = None
+            if not self._entries:
+                self._wakeup.set()
+
+    def _run(self) -> None:
+        """心跳循环：睡眠到最早的到期时间，发送到期客户端的心跳"""
+        while True:
+            with self._lock:
+                if not self._entries:
+                    self._thread = None
+                    self._heap.clear()
+                    self._wakeup.clear()
+                    idle_http, self._http = list(self._http.values()), {}
+                    break
+
+                # 丢弃已移除客户端的元素
+                while self._heap[0][2] is None:
+                    heapq.heappop(self._heap)
+
+                # 有客户端到期时，取出全部到期以及即将到期的客户端
+                now = time.monotonic()
+                due = []
+                if self._heap[0][0] <= now:
+                    deadline = now + _COALESCE_WINDOW
+                    while self._heap and self._heap[0][0] <= deadline:
+                        entry = heapq.heappop(self._heap)
+                        if entry[2] is not None:
+                            due.append(entry)
+                timeout = self._heap[0][0] - now if self._heap else None
+
+                # 按注册中心分组
+                groups: dict[tuple[str, bool, bool], list] = {}
+                for entry in due:
+                    client = entry[2]
+                    key = (client.registry_url, client.trust_env, client.http2)
+                    groups.setdefault(key, []).append(client)
+
+            if not due:
+                self._wakeup.wait(timeout)
+                self._wakeup.clear()
+                continue
+
+            for key, clients in groups.items():
+                self._send(key, clients)
+
+            # 发送后再安排下一次心跳：间隔取决于本次心跳是否成功（失败时提前重试）
+            with self._lock:
+                now = time.monotonic()
+                for entry in due:
+                    client = entry[2]
+                    # 发送期间已被移除（或移除后重新加入）的客户端不再安排
+                    if client is None or self._entries.get(client) is not entry:
+                        continue
+                    entry = [now + client._next_heartbeat_delay(), next(self._counter), client]
+                    self._entries[client] = entry
+                    heapq.heappush(self._heap, entry)
+
+        for http in idle_http:
+            http.close()
+
+    def _send(self, key: tuple[str, bool, bool], clients: list) -> None:
+        """向一个注册中心发送一批心跳"""
+        registry_url, trust_env, http2 = key
+        if len(clients) == 1 or registry_url in self._unsupported:
+            for client in clients:
+                client._heartbeat()
+            return
+
+        http = self._http.get(key)
+        if http is None:
+            http = self._http[key] = httpx.Client(
+                timeout=5, **client_options(trust_env, http2)
+            )
+        try:
+            response = http.post(
+                f"{registry_url}/api/v1/services/heartbeats",
+                json={"service_ids": [c.service_id for c in clients]},
+            )
+        except Exception as e:
+            for client in clients:
+                record_heartbeat(client, False, repr(e))
+            return
+
+        if response.status_code in (404, 405):
+            # 注册中心不支持批量心跳，之后逐个发送
+            self._unsupported.add(registry_url)
+            for client in clients:
+                client._heartbeat()
+            return
+
+        if response.status_code != 200:
+            for client in clients:
+                record_heartbeat(client, False, f"HTTP {response.status_code}")
+            return
+
+        try:
+            missing = set(response.json().get("missing", ()))
+        except ValueError:
+            missing = set()
+        for client in clients:
+            if client.service_id in missing:
+                # 注册中心中已没有该服务，重新注册（发送期间已停止的客户端除外）
+                if client._running:
+                    client._reregister()
+            else:
+                record_heartbeat(client, True)
+
+
+# 进程内共享的心跳发送器
+heartbeat_batcher = _HeartbeatBatcher()
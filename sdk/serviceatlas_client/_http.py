@@ -0,0 +1,26 @@
+"""
+与注册中心通信的 HTTP 客户端配置
+"""
+import importlib.util
+from typing import Any, Dict
+
+from serviceatlas_client import __version__
+
+
+# HTTP/2 需要安装 h2（pip install "httpx[http2]"），未安装时使用 HTTP/1.1。
+# httpx 只通过 TLS（ALPN）协商 HTTP/2，不支持明文 h2c，http:// 地址始终使用 HTTP/1.1
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+_HEADERS = {"User-Agent": f"serviceatlas-client/{__version__}"}
+
+
+def client_options(trust_env: bool, http2: bool) -> Dict[str, Any]:
+    """
+    构建 httpx.Client / httpx.AsyncClient 的公共参数
+    http2 只对 https:// 注册中心生效
+    """
+    return {
+        "trust_env": trust_env,
+        "http2": http2 and HTTP2_AVAILABLE,
+        "headers": _HEADERS,
+    }
@@ -0,0 +1,32 @@
+"""
+SDK 日志
+所有状态输出通过 "serviceatlas_client" logger，由应用自行配置级别和输出位置
+"""
+import logging
+
+
+logger = logging.getLogger("serviceatlas_client")
+
+# 心跳连续失败时每隔多少次输出一条警告，注册中心长时间不可用时不刷屏
+_HEARTBEAT_WARN_EVERY = 10
+
+
+def record_heartbeat(client, ok: bool, detail: str = "") -> bool:
+    """记录心跳结果：成功只输出调试日志，连续失败时第 1、11、21... 次输出警告"""
+    if ok:
+        if client._consecutive_failures:
+            logger.info(
+                "服务 '%s' 心跳恢复（此前连续失败 %d 次）",
+                client.service_id, client._consecutive_failures
+            )
+            client._consecutive_failures = 0
+        else:
+            logger.debug("服务 '%s' 心跳成功", client.service_id)
+    else:
+        client._consecutive_failures += 1
+        if client._consecutive_failures % _HEARTBEAT_WARN_EVERY == 1:
+            logger.warning(
+                "服务 '%s' 心跳失败（连续 %d 次）: %s",
+                client.service_id, client._consecutive_failures, detail
+            )
+    return ok
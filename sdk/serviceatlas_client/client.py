@@ -4,11 +4,58 @@ ServiceAtlas Client
 """
 import asyncio
 import atexit
+import json
+import random
 import signal
 import threading
 from typing import Optional, Dict, Any
 import httpx
 
+from serviceatlas_client._batcher import heartbeat_batcher
+from serviceatlas_client._http import client_options
+from serviceatlas_client._log import logger, record_heartbeat
+
+
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+# 注销请求的超时（秒）：注销发生在进程退出过程中，不应长时间阻塞退出
+_UNREGISTER_TIMEOUT = 1
+_ASYNC_UNREGISTER_DEADLINE = 0.5
+
+# 心跳返回这些状态码时说明注册中心中已没有该服务（如注册中心重启后数据丢失、服务被清理），重新注册
+_REREGISTER_STATUS = (401, 404, 410)
+
+
+def _retry_delay(failures: int, interval: float) -> float:
+    """失败后的重试间隔：带随机抖动的指数退避，最长不超过心跳间隔"""
+    return min(interval, 2 ** failures + random.random() * 0.5)
+
+
+def _build_register_body(client) -> bytes:
+    """构建注册请求体（JSON bytes）"""
+    register_data = {
+        "id": client.service_id,
+        "name": client.service_name,
+        "host": client.host,
+        "port": client.port,
+        "protocol": client.protocol,
+        "health_check_path": client.health_check_path,
+        "is_gateway": client.is_gateway,
+        "service_meta": client.metadata,
+    }
+    # 只有设置了 base_path 才发送该字段
+    if client.base_path:
+        register_data["base_path"] = client.base_path
+    return json.dumps(register_data, ensure_ascii=False).encode("utf-8")
+
+
+def _registered_healthy(response: httpx.Response) -> bool:
+    """注册响应中的服务状态是否已是 healthy（即注册中心已将注册计为一次心跳）"""
+    try:
+        return response.json().get("status") == "healthy"
+    except ValueError:
+        return False
+
 
 class ServiceAtlasClient:
     """
@@ -25,6 +72,7 @@ class ServiceAtlasClient:
         service_name="DeckView 文档预览服务",
         host="127.0.0.1",
         port=8000,
+        install_exit_handlers=True,  # 独立脚本中使用：退出或收到 SIGTERM/SIGINT 时自动注销
     )
 
     # 启动（注册 + 心跳）
@@ -50,6 +98,8 @@ class ServiceAtlasClient:
         metadata: Optional[Dict[str, Any]] = None,
         heartbeat_interval: int = 30,
         trust_env: bool = True,
+        http2: bool = True,
+        install_exit_handlers: bool = False,
     ):
         """
         初始化客户端
@@ -67,6 +117,10 @@ class ServiceAtlasClient:
             metadata: 扩展元数据
             heartbeat_interval: 心跳间隔（秒）
             trust_env: 是否信任环境变量中的代理配置（默认 True，设为 False 可禁用代理）
+            http2: 是否使用 HTTP/2 与注册中心通信（仅对 https:// 地址生效，需安装 httpx[http2]；
+                http:// 地址以及未安装 h2 时使用 HTTP/1.1）
+            install_exit_handlers: 是否注册 atexit 和 SIGTERM/SIGINT 处理，在进程退出时自动注销
+                （默认 False；在 uvicorn/gunicorn 等自行管理信号的框架中请保持关闭，改为在其关闭钩子中调用 stop()）
         """
         self.registry_url = registry_url.rstrip("/")
         self.service_id = service_id
@@ -80,18 +134,44 @@ class ServiceAtlasClient:
         self.metadata = metadata or {}
         self.heartbeat_interval = heartbeat_interval
         self.trust_env = trust_env
+        self.http2 = http2
 
-        self._running = False
-        self._heartbeat_thread: Optional[threading.Thread] = None
+        # 注册数据和请求地址在运行期间不变，预先构建（注册数据预先序列化为 JSON）
+        # 注册请求同时作为第一次心跳，启动时省去一次单独的心跳请求
+        self._register_url = f"{self.registry_url}/api/v1/services?heartbeat=true"
+        self._register_body = _build_register_body(self)
+        self._service_url = f"{self.registry_url}/api/v1/services/{self.service_id}"
+        self._heartbeat_url = f"{self._service_url}/heartbeat"
 
-        # 注册退出处理
-        atexit.register(self.stop)
-        signal.signal(signal.SIGTERM, self._signal_handler)
-        signal.signal(signal.SIGINT, self._signal_handler)
+        self._running = False
+        # 运行代数：每次停止时递增。心跳线程重新注册时据此判断期间客户端是否已停止；
+        # 锁只保护状态切换，不在持锁时发送请求
+        self._generation = 0
+        self._state_lock = threading.Lock()
+        # 连续心跳失败次数（用于退避重试和限制失败日志的频率）
+        self._consecutive_failures = 0
+        # 与注册中心通信的持久 HTTP 客户端（start 时创建，stop 时关闭），复用连接
+        self._client: Optional[httpx.Client] = None
+
+        # 退出处理（可选）：信号处理器只能在主线程注册，且会替换进程原有的处理器
+        self._previous_handlers: Dict[int, Any] = {}
+        if install_exit_handlers:
+            atexit.register(self.stop)
+            for signum in (signal.SIGTERM, signal.SIGINT):
+                try:
+                    self._previous_handlers[signum] = signal.signal(signum, self._signal_handler)
+                except ValueError:
+                    pass
 
     def _signal_handler(self, signum, frame):
-        """信号处理器，用于优雅退出"""
+        """信号处理器：注销服务后交给原有的处理器，保持原本的退出行为"""
         self.stop()
+        previous = self._previous_handlers.get(signum)
+        if callable(previous):
+            previous(signum, frame)
+        elif previous == signal.SIG_DFL:
+            signal.signal(signum, signal.SIG_DFL)
+            signal.raise_signal(signum)
 
     def start(self) -> bool:
         """
@@ -103,19 +183,16 @@ class ServiceAtlasClient:
         if self._running:
             return True
 
+        self._open_client()
+
         # 注册服务
         if not self._register():
+            self._close_client()
             return False
 
-        # 启动心跳线程
-        self._running = True
-        self._heartbeat_thread = threading.Thread(
-            target=self._heartbeat_loop,
-            daemon=True
-        )
-        self._heartbeat_thread.start()
+        self._start_heartbeat()
 
-        print(f"[ServiceAtlas] 服务 '{self.service_id}' 已注册并开始心跳")
+        logger.info("服务 '%s' 已注册并开始心跳", self.service_id)
         return True
 
     def stop(self):
@@ -123,84 +200,152 @@ class ServiceAtlasClient:
         if not self._running:
             return
 
-        self._running = False
-
-        # 等待心跳线程结束
-        if self._heartbeat_thread and self._heartbeat_thread.is_alive():
-            self._heartbeat_thread.join(timeout=2)
+        atexit.unregister(self.stop)
+        self._mark_stopped()
+        heartbeat_batcher.remove(self)
 
         # 注销服务
         self._unregister()
-        print(f"[ServiceAtlas] 服务 '{self.service_id}' 已注销")
+        self._close_client()
+        logger.info("服务 '%s' 已注销", self.service_id)
 
-    def _register(self) -> bool:
-        """注册服务到 ServiceAtlas"""
+    def _start_heartbeat(self):
+        """
+        开始心跳（服务已注册）
+        加入进程内共享的心跳发送器：所有客户端共用一个后台线程，同一注册中心的心跳合并发送
+        """
+        self._open_client()
+        with self._state_lock:
+            self._running = True
+        heartbeat_batcher.add(self)
+
+    def _stop_heartbeat(self):
+        """停止心跳并关闭 HTTP 客户端（不注销服务）"""
+        self._mark_stopped()
+        heartbeat_batcher.remove(self)
+        self._close_client()
+
+    def _mark_stopped(self):
+        """标记客户端已停止，进行中的重新注册完成后会撤销其注册"""
+        with self._state_lock:
+            self._running = False
+            self._generation += 1
+
+    def _open_client(self):
+        """创建 HTTP 客户端"""
+        if self._client is None:
+            self._client = httpx.Client(
+                timeout=10,
+                limits=httpx.Limits(max_keepalive_connections=4, keepalive_expiry=120),
+                **client_options(self.trust_env, self.http2),
+            )
+
+    def _close_client(self):
+        """关闭 HTTP 客户端"""
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+
+    def _register(self, heartbeat_fallback: bool = True) -> bool:
+        """
+        注册服务到 ServiceAtlas
+        heartbeat_fallback: 注册中心不支持注册时上报心跳时是否补发一次心跳
+        """
         try:
-            # 构建注册数据
-            register_data = {
-                "id": self.service_id,
-                "name": self.service_name,
-                "host": self.host,
-                "port": self.port,
-                "protocol": self.protocol,
-                "health_check_path": self.health_check_path,
-                "is_gateway": self.is_gateway,
-                "service_meta": self.metadata,
-            }
-            # 只有设置了 base_path 才发送该字段
-            if self.base_path:
-                register_data["base_path"] = self.base_path
-
-            with httpx.Client(timeout=10, trust_env=self.trust_env) as client:
-                response = client.post(
-                    f"{self.registry_url}/api/v1/services",
-                    json=register_data
-                )
-                if response.status_code in (200, 201):
-                    return True
-                else:
-                    print(f"[ServiceAtlas] 注册失败: {response.text}")
-                    return False
+            response = self._client.post(
+                self._register_url,
+                content=self._register_body,
+                headers=_JSON_HEADERS
+            )
+            if response.status_code in (200, 201):
+                # 旧版本注册中心不支持注册时上报心跳，补发一次
+                if heartbeat_fallback and not _registered_healthy(response):
+                    self._heartbeat()
+                return True
+            else:
+                logger.warning("服务 '%s' 注册失败: %s", self.service_id, response.text)
+                return False
         except Exception as e:
-            print(f"[ServiceAtlas] 注册异常: {e}")
+            logger.warning("服务 '%s' 注册异常: %s", self.service_id, e)
             return False
 
     def _unregister(self):
-        """从 ServiceAtlas 注销服务"""
+        """
+        从 ServiceAtlas 注销服务
+        在退出过程中调用，使用较短的超时；注册中心不可达时直接放弃（服务会因心跳超时被标记）
+        """
         try:
-            with httpx.Client(timeout=5, trust_env=self.trust_env) as client:
-                client.delete(
-                    f"{self.registry_url}/api/v1/services/{self.service_id}"
-                )
+            self._client.delete(
+                self._service_url,
+                timeout=_UNREGISTER_TIMEOUT
+            )
+        except httpx.TransportError:
+            pass
         except Exception as e:
-            print(f"[ServiceAtlas] 注销异常: {e}")
+            logger.warning("服务 '%s' 注销异常: %s", self.service_id, e)
 
     def _heartbeat(self) -> bool:
         """发送一次心跳"""
         try:
-            with httpx.Client(timeout=5, trust_env=self.trust_env) as client:
-                response = client.post(
-                    f"{self.registry_url}/api/v1/services/{self.service_id}/heartbeat"
-                )
-                return response.status_code == 200
-        except Exception:
+            response = self._client.post(
+                self._heartbeat_url,
+                timeout=5
+            )
+        except Exception as e:
+            return record_heartbeat(self, False, repr(e))
+        if response.status_code in _REREGISTER_STATUS:
+            return self._reregister()
+        return record_heartbeat(
+            self, response.status_code == 200, f"HTTP {response.status_code}"
+        )
+
+    def _reregister(self) -> bool:
+        """
+        注册中心中已没有该服务时重新注册（注册同时计为一次心跳）
+        在心跳线程中调用；客户端已停止时不再注册（心跳请求可能在 stop 之前发出）
+        """
+        with self._state_lock:
+            if not self._running:
+                return False
+            generation = self._generation
+
+        # 不补发心跳：心跳再次返回 404 时会回到这里，形成递归
+        logger.info("服务 '%s' 不在注册中心中，重新注册", self.service_id)
+        registered = self._register(heartbeat_fallback=False)
+
+        with self._state_lock:
+            stopped = generation != self._generation
+            running = self._running
+        if stopped:
+            # 注册期间客户端已停止：注册请求可能晚于 stop 的注销到达，
+            # 客户端没有重新启动时撤销这次注册
+            if registered and not running:
+                self._discard_registration()
             return False
+        return record_heartbeat(self, registered, "重新注册失败")
+
+    def _discard_registration(self):
+        """撤销停止后才完成的重新注册（stop 已关闭 HTTP 客户端，使用一次性请求）"""
+        try:
+            with httpx.Client(**client_options(self.trust_env, self.http2)) as client:
+                client.delete(self._service_url, timeout=_UNREGISTER_TIMEOUT)
+        except Exception:
+            pass
 
-    def _heartbeat_loop(self):
-        """心跳循环"""
-        while self._running:
-            self._heartbeat()
-            # 分段等待，以便快速响应停止信号
-            for _ in range(self.heartbeat_interval):
-                if not self._running:
-                    break
-                threading.Event().wait(1)
+    def _next_heartbeat_delay(self) -> float:
+        """距下一次心跳的时间：心跳失败时提前重试"""
+        if self._consecutive_failures:
+            return _retry_delay(self._consecutive_failures, self.heartbeat_interval)
+        return self.heartbeat_interval
 
 
 class AsyncServiceAtlasClient:
     """
     异步版本的 ServiceAtlas 注册客户端
     适用于 FastAPI 等异步框架
+
+    注册和注销在事件循环中进行；心跳交给进程内共享的心跳线程发送，
+    事件循环被 CPU 密集的任务长时间占用时心跳也能按时发出，不会被注册中心误判为下线
     """
 
     def __init__(
@@ -217,6 +362,7 @@ class AsyncServiceAtlasClient:
         metadata: Optional[Dict[str, Any]] = None,
         heartbeat_interval: int = 30,
         trust_env: bool = True,
+        http2: bool = True,
     ):
         """
         初始化异步客户端
@@ -234,6 +380,8 @@ class AsyncServiceAtlasClient:
             metadata: 扩展元数据
             heartbeat_interval: 心跳间隔（秒）
             trust_env: 是否信任环境变量中的代理配置（默认 True，设为 False 可禁用代理）
+            http2: 是否使用 HTTP/2 与注册中心通信（仅对 https:// 地址生效，需安装 httpx[http2]；
+                http:// 地址以及未安装 h2 时使用 HTTP/1.1）
         """
         self.registry_url = registry_url.rstrip("/")
         self.service_id = service_id
@@ -247,22 +395,62 @@ class AsyncServiceAtlasClient:
         self.metadata = metadata or {}
         self.heartbeat_interval = heartbeat_interval
         self.trust_env = trust_env
+        self.http2 = http2
+
+        # 注册数据和请求地址在运行期间不变，预先构建（注册数据预先序列化为 JSON）
+        # 注册请求同时作为第一次心跳，启动时省去一次单独的心跳请求
+        self._register_url = f"{self.registry_url}/api/v1/services?heartbeat=true"
+        self._register_body = _build_register_body(self)
+        self._service_url = f"{self.registry_url}/api/v1/services/{self.service_id}"
+        self._heartbeat_url = f"{self._service_url}/heartbeat"
 
         self._running = False
-        self._heartbeat_task: Optional[asyncio.Task] = None
+        self._consecutive_failures = 0
+        # 在心跳线程中发送心跳的同步客户端（只用于心跳和心跳失败后的重新注册）
+        self._heartbeat_client = ServiceAtlasClient(
+            registry_url=self.registry_url,
+            service_id=service_id,
+            service_name=service_name,
+            host=host,
+            port=port,
+            protocol=protocol,
+            health_check_path=health_check_path,
+            is_gateway=is_gateway,
+            base_path=base_path,
+            metadata=metadata,
+            heartbeat_interval=heartbeat_interval,
+            trust_env=trust_env,
+            http2=http2,
+        )
+        # 与注册中心通信的持久 HTTP 客户端（start 时创建，stop 时关闭），复用连接
+        self._client: Optional[httpx.AsyncClient] = None
 
     async def start(self) -> bool:
         """启动客户端：注册服务并开始心跳"""
         if self._running:
             return True
 
-        if not await self._register():
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=10,
+                limits=httpx.Limits(max_keepalive_connections=4, keepalive_expiry=120),
+                **client_options(self.trust_env, self.http2),
+            )
+
+        try:
+            registered = await self._register()
+        except asyncio.CancelledError:
+            # 注册过程中被取消（如应用在注册完成前关闭）
+            await self._close_client()
+            raise
+        if not registered:
+            await self._close_client()
             return False
 
         self._running = True
-        self._heartbeat_task = asyncio.create_task(self._heartbeat_loop())
+        self._heartbeat_client._start_heartbeat()
 
-        print(f"[ServiceAtlas] 服务 '{self.service_id}' 已注册并开始心跳")
+        logger.info("服务 '%s' 已注册并开始心跳", self.service_id)
         return True
 
     async def stop(self):
@@ -271,63 +459,61 @@ class AsyncServiceAtlasClient:
             return
 
         self._running = False
-
-        if self._heartbeat_task:
-            self._heartbeat_task.cancel()
-            try:
-                await self._heartbeat_task
-            except asyncio.CancelledError:
-                pass
+        # 先停止心跳再注销；心跳线程中进行中的重新注册完成后会自行撤销
+        self._heartbeat_client._stop_heartbeat()
 
         await self._unregister()
-        print(f"[ServiceAtlas] 服务 '{self.service_id}' 已注销")
+        await self._close_client()
+        logger.info("服务 '%s' 已注销", self.service_id)
+
+    async def _close_client(self):
+        """关闭 HTTP 客户端"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
 
     async def _register(self) -> bool:
         """注册服务"""
         try:
-            # 构建注册数据
-            register_data = {
-                "id": self.service_id,
-                "name": self.service_name,
-                "host": self.host,
-                "port": self.port,
-                "protocol": self.protocol,
-                "health_check_path": self.health_check_path,
-                "is_gateway": self.is_gateway,
-                "service_meta": self.metadata,
-            }
-            # 只有设置了 base_path 才发送该字段
-            if self.base_path:
-                register_data["base_path"] = self.base_path
-
-            async with httpx.AsyncClient(timeout=10, trust_env=self.trust_env) as client:
-                response = await client.post(
-                    f"{self.registry_url}/api/v1/services",
-                    json=register_data
-                )
-                return response.status_code in (200, 201)
+            response = await self._client.post(
+                self._register_url,
+                content=self._register_body,
+                headers=_JSON_HEADERS
+            )
+            if response.status_code not in (200, 201):
+                logger.warning("服务 '%s' 注册失败: %s", self.service_id, response.text)
+                return False
+            # 旧版本注册中心不支持注册时上报心跳，补发一次
+            if not _registered_healthy(response):
+                await self._heartbeat()
+            return True
         except Exception as e:
-            print(f"[ServiceAtlas] 注册异常: {e}")
+            logger.warning("服务 '%s' 注册异常: %s", self.service_id, e)
             return False
 
     async def _unregister(self):
-        """注销服务"""
+        """
+        注销服务
+        在关闭过程中调用，整体限时 0.5 秒，注册中心无响应时不拖慢应用退出
+        """
         try:
-            async with httpx.AsyncClient(timeout=5, trust_env=self.trust_env) as client:
-                await client.delete(
-                    f"{self.registry_url}/api/v1/services/{self.service_id}"
-                )
+            await asyncio.wait_for(
+                self._client.delete(self._service_url),
+                timeout=_ASYNC_UNREGISTER_DEADLINE
+            )
         except Exception:
             pass
 
-    async def _heartbeat_loop(self):
-        """心跳循环"""
-        while self._running:
-            try:
-                async with httpx.AsyncClient(timeout=5, trust_env=self.trust_env) as client:
-                    await client.post(
-                        f"{self.registry_url}/api/v1/services/{self.service_id}/heartbeat"
-                    )
-            except Exception:
-                pass
-            await asyncio.sleep(self.heartbeat_interval)
+    async def _heartbeat(self) -> bool:
+        """发送一次心跳（注册后补发；之后的心跳由心跳线程发送）"""
+        try:
+            # httpx 的超时按连接、读、写分别计算，wait_for 限制整次心跳的总耗时
+            response = await asyncio.wait_for(
+                self._client.post(self._heartbeat_url, timeout=5),
+                timeout=5
+            )
+        except Exception as e:
+            return record_heartbeat(self, False, repr(e))
+        return record_heartbeat(
+            self, response.status_code == 200, f"HTTP {response.status_code}"
+        )
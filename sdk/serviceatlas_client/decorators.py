@@ -2,10 +2,47 @@
 FastAPI 集成装饰器
 提供更简洁的 FastAPI 应用注册方式
 """
+import asyncio
+import warnings
+from contextlib import asynccontextmanager
 from typing import Optional, Dict, Any
 from functools import wraps
 
-from serviceatlas_client.client import AsyncServiceAtlasClient
+from serviceatlas_client.client import AsyncServiceAtlasClient, _retry_delay
+
+
+# 应用关闭时等待注销完成的最长时间（秒）
+_STOP_TIMEOUT = 2
+
+
+async def _start_until_registered(client: AsyncServiceAtlasClient) -> None:
+    """在后台注册服务，注册中心不可用时按指数退避重试（最长间隔为心跳间隔）"""
+    attempts = 0
+    while not await client.start():
+        attempts += 1
+        await asyncio.sleep(_retry_delay(attempts, client.heartbeat_interval))
+
+
+@asynccontextmanager
+async def _client_lifespan(client: AsyncServiceAtlasClient):
+    """
+    客户端生命周期：启动时在后台注册，不等待注册中心响应，应用可立即就绪；
+    关闭时停止尚未完成的注册并注销服务，注销限时 _STOP_TIMEOUT 秒
+    """
+    start_task = asyncio.create_task(_start_until_registered(client))
+    try:
+        yield
+    finally:
+        if not start_task.done():
+            start_task.cancel()
+            try:
+                await start_task
+            except asyncio.CancelledError:
+                pass
+        try:
+            await asyncio.wait_for(client.stop(), timeout=_STOP_TIMEOUT)
+        except asyncio.TimeoutError:
+            pass
 
 
 def register_service(
@@ -21,9 +58,12 @@ def register_service(
     metadata: Optional[Dict[str, Any]] = None,
     heartbeat_interval: int = 30,
     trust_env: bool = True,
+    http2: bool = True,
 ):
     """
-    FastAPI 应用注册装饰器
+    FastAPI 应用注册装饰器（已不推荐使用，请改用 fastapi_lifespan）
+
+    在应用原有的 lifespan 外层加入客户端的生命周期，注册在后台进行，不阻塞应用启动
 
     使用示例:
     ```python
@@ -50,12 +90,22 @@ def register_service(
     app = create_app()
     ```
     """
+    warnings.warn(
+        "register_service 已不推荐使用，请改用 fastapi_lifespan",
+        DeprecationWarning,
+        stacklevel=2,
+    )
+
     def decorator(create_app_func):
         @wraps(create_app_func)
         def wrapper(*args, **kwargs):
             app = create_app_func(*args, **kwargs)
 
-            # 创建客户端
+            # 同一个 app 只注入一次（工厂函数返回已创建过的 app 时不再重复创建客户端）
+            if getattr(app.state, "serviceatlas_client", None) is not None:
+                return app
+
+            # 创建客户端（此时只保存配置，HTTP 连接在 start 时建立）
             client = AsyncServiceAtlasClient(
                 registry_url=registry_url,
                 service_id=service_id,
@@ -69,18 +119,20 @@ def register_service(
                 metadata=metadata,
                 heartbeat_interval=heartbeat_interval,
                 trust_env=trust_env,
+                http2=http2,
             )
+            app.state.serviceatlas_client = client
 
-            # 注入生命周期事件
-            original_on_event = getattr(app, 'on_event', None)
+            # 将客户端的生命周期套在应用原有的 lifespan 外层
+            original_lifespan = app.router.lifespan_context
 
-            @app.on_event("startup")
-            async def startup_register():
-                await client.start()
+            @asynccontextmanager
+            async def lifespan(app):
+                async with _client_lifespan(client):
+                    async with original_lifespan(app) as state:
+                        yield state
 
-            @app.on_event("shutdown")
-            async def shutdown_unregister():
-                await client.stop()
+            app.router.lifespan_context = lifespan
 
             return app
         return wrapper
@@ -100,6 +152,7 @@ def fastapi_lifespan(
     metadata: Optional[Dict[str, Any]] = None,
     heartbeat_interval: int = 30,
     trust_env: bool = True,
+    http2: bool = True,
 ):
     """
     FastAPI lifespan 上下文管理器（推荐用于 FastAPI 0.95+）
@@ -121,9 +174,7 @@ def fastapi_lifespan(
     app = FastAPI(lifespan=lifespan)
     ```
     """
-    from contextlib import asynccontextmanager
-
-    client = AsyncServiceAtlasClient(
+    options = dict(
         registry_url=registry_url,
         service_id=service_id,
         service_name=service_name,
@@ -136,14 +187,19 @@ def fastapi_lifespan(
         metadata=metadata,
         heartbeat_interval=heartbeat_interval,
         trust_env=trust_env,
+        http2=http2,
     )
 
     @asynccontextmanager
     async def lifespan(app):
-        # 启动时注册
-        await client.start()
-        yield
-        # 关闭时注销
-        await client.stop()
+        # 客户端在应用启动时创建（每个应用生命周期一个），不在导入模块时创建
+        client = AsyncServiceAtlasClient(**options)
+        app.state.serviceatlas_client = client
+        try:
+            # 启动时在后台注册，关闭时注销
+            async with _client_lifespan(client):
+                yield
+        finally:
+            app.state.serviceatlas_client = None
 
     return lifespan